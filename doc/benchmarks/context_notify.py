@@ -0,0 +1,46 @@
+# Copyright (C) 2023 IKUS Software. All rights reserved.
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+# USA
+"""
+Measure the latency of a single `Context` update while the number of
+unrelated watchers grows. The latency should stay flat.
+"""
+import timeit
+
+import tkvue
+
+
+def noop(value):
+    pass
+
+
+def main():
+    print("%10s %15s" % ("watchers", "usec per set"))
+    for count in [0, 10, 100, 1000, 10000]:
+        data = tkvue.Context({"value": 0, **{"unrelated%s" % i: i for i in range(count)}})
+        for i in range(count):
+            data.watch("unrelated%s" % i, noop)
+        data.watch("value", noop)
+
+        def update():
+            data.value += 1
+
+        number = 10000
+        elapsed = min(timeit.repeat(update, number=number, repeat=5))
+        print("%10s %15.3f" % (count, elapsed / number * 1000000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Copyright (C) 2023 IKUS Software. All rights reserved.
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+# USA
+"""
+Measure the idle CPU usage and the input latency of the asyncio mainloop
+with and without the event-driven mode, also with a periodic user timer
+scheduled with `after()`. Requires an X11 display.
+
+The input latency is measured from a second Tk process using `send`, which
+round-trips through the X server like user input does.
+"""
+import asyncio
+import subprocess
+import sys
+import time
+
+import tkvue
+
+IDLE_SECONDS = 5
+SAMPLES = 100
+
+
+class IdleDialog(tkvue.Component):
+    template = """
+    <TopLevel title="Benchmark">
+        <Label text="{{text}}" />
+    </TopLevel>
+    """
+
+    periodic_timer = False
+
+    def __init__(self, *args, **kwargs):
+        self.data = tkvue.Context({"text": "idle"})
+        super().__init__(*args, **kwargs)
+        if self.periodic_timer:
+            self.root.after(1000, self.refresh)
+
+    def refresh(self):
+        # Periodic timer like an application refreshing its status.
+        self.root.after(1000, self.refresh)
+
+
+def client(appname):
+    """
+    Measure the round-trip of `send` to the benchmarked application.
+    """
+    import tkinter
+
+    root = tkinter.Tk()
+    root.withdraw()
+    latencies = []
+    for i in range(SAMPLES):
+        start = time.perf_counter()
+        root.tk.call("send", appname, "set", "sample", i)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print("%.3f %.3f" % (latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000))
+
+
+async def measure(dlg):
+    # Idle CPU usage and number of wake ups.
+    wakeups = 0
+    update_root = dlg._update_root
+
+    async def counting_update_root():
+        nonlocal wakeups
+        wakeups += 1
+        return await update_root()
+
+    dlg._update_root = counting_update_root
+    task = asyncio.get_running_loop().create_task(dlg._async_mainloop())
+    await asyncio.sleep(1)
+    wakeups = 0
+    cpu = time.process_time()
+    await asyncio.sleep(IDLE_SECONDS)
+    cpu = time.process_time() - cpu
+    # Input latency from another process.
+    appname = dlg.root.tk.call("tk", "appname")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, __file__, "--client", appname, stdout=subprocess.PIPE
+    )
+    stdout, unused = await process.communicate()
+    dlg.root.destroy()
+    await task
+    return cpu / IDLE_SECONDS * 100, wakeups / IDLE_SECONDS, stdout.decode().strip()
+
+
+def main():
+    print("%22s %10s %15s %25s" % ("mode", "cpu %", "wakeups/sec", "latency ms (p50 p95)"))
+    for event_driven, periodic_timer in [(False, False), (True, False), (False, True), (True, True)]:
+        IdleDialog.event_driven = event_driven
+        IdleDialog.periodic_timer = periodic_timer
+        dlg = IdleDialog()
+        cpu, wakeups, latency = asyncio.run(measure(dlg))
+        mode = "event-driven" if event_driven else "polling"
+        if periodic_timer:
+            mode += " + timer"
+        print("%22s %10.2f %15.1f %25s" % (mode, cpu, wakeups, latency))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--client":
+        client(sys.argv[2])
+    else:
+        main()
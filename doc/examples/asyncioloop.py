@@ -14,8 +14,6 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 # USA
 
-import asyncio
-
 import aiohttp
 import pkg_resources
 
@@ -57,15 +55,14 @@ class RootDialog(tkvue.Component):
             }
         )
         super().__init__(*args, **kwargs)
-        self.root.after(3000, self._check_latest_version)
-
-    def _check_latest_version(self):
-        asyncio.get_running_loop().create_task(self._check_latest_version_task())
+        self.root.after(3000, self.check_latest_version_button.invoke)
 
-    async def _check_latest_version_task(self):
-        self.data['checking_for_update'] = True
-        self.data['is_latest'] = None
-        self.data['check_latest_version_error'] = None
+    @tkvue.command(policy="drop", disable=True)
+    async def _check_latest_version(self):
+        with self.data.batch():
+            self.data['checking_for_update'] = True
+            self.data['is_latest'] = None
+            self.data['check_latest_version_error'] = None
 
         # Query latest version.
         try:
@@ -54,35 +54,20 @@ class ModalDialog(tkvue.Component):
     def return_event(self, event=None):
         # Quit this windows
         if self.data['password']:
-            self.root.destroy()
+            self.close_modal(self.data['password'])
         else:
             self.root.bell()
 
     def cancel_event(self, event=None):
-        # Remove password value
-        self.data['password'] = ''
-        # Close this windows
-        self.root.destroy()
-
-    def modal(self):
-        """
-        Following tkinter documentation to make a TopLevel windows Modal.
-        https://tkdocs.com/tutorial/windows.html#dialogs
-        """
-        self.root.protocol("WM_DELETE_WINDOW", self.cancel_event)  # intercept close button
-        if self.root.master:
-            self.root.transient(self.root.master)  # dialog window is related to main
-            self.root.tk.eval('tk::PlaceWindow %s widget %s' % (self.root, self.root.master))
-        self.root.wait_visibility()  # can't grab until window appears, so we wait
-        self.root.grab_set()  # ensure all input goes to our window
-        self.root.wait_window()  # block until window is destroyed
+        # Close this windows without password
+        self.close_modal('')
 
 
 class RootDialog(tkvue.Component):
     template = """
 <TopLevel geometry="322x261" title="TKVue Test" >
     <Frame pack-fill="both" pack-expand="true" padding="10" >
-        <Button text="Show modal Dialog" command="show_modal" />
+        <Button text="Show modal Dialog" command="show_dialog" />
         <Label text="Modal dialog return value: " />
         <Label text="{{ returnvalue }}" />
     </Frame>
@@ -93,11 +78,15 @@ class RootDialog(tkvue.Component):
     def __init__(self, master=None):
         super().__init__(master)
         self.root.tk.eval('tk::PlaceWindow %s pointer' % (self.root))
-
-    def show_modal(self, event=None):
-        dlg = ModalDialog(self.root)
-        dlg.modal()
-        self.data['returnvalue'] = dlg.data['password']
+        self.dialog = None
+
+    async def show_dialog(self, event=None):
+        # Create the dialog once and show it again on next call.
+        if self.dialog is None:
+            self.dialog = ModalDialog(self.root)
+        self.dialog.data['password'] = ''
+        # The event loop keeps running while the dialog is shown.
+        self.data['returnvalue'] = await self.dialog.show_modal() or ''
 
 
 if __name__ == "__main__":
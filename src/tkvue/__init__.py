@@ -1,16 +1,32 @@
 # Copyright (C) 2023 IKUS Software. All rights reserved.
 # IKUS Software inc. PROPRIETARY/CONFIDENTIAL.
 # Use is subject to license terms.
+import ast
 import asyncio
+import bisect
 import collections
+import concurrent.futures
+import contextlib
 import functools
+import hashlib
+import importlib
 import logging
 import os
+import re
+import sys
+import threading
+import time
 import tkinter
+import weakref
 from html.parser import HTMLParser
 from itertools import chain
 from tkinter import ttk
 
+try:
+    from PIL import Image, ImageSequence, ImageTk
+except ImportError:
+    Image = None
+
 try:
     from gettext import gettext
 except ImportError:
@@ -21,10 +37,19 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# When enabled, report Context updated outside of the UI thread.
+debug = sys.flags.dev_mode or bool(os.environ.get("TKVUE_DEBUG"))
+
 
 _components = {}  # Component registry.
 _widgets = {}  # Widget registry
 _attrs = {}  # Attribute registry
+_attrs_cache = {}  # Attribute handler resolved by widget class
+_builders = {}  # Compiled template registry
+_atlases = {}  # Named regions of images
+_wakeups = set()  # Wake up event loops when widgets get updated
+_compiled_modules = set()  # Compiled modules already looked up
+_mainloop_loop = None  # Event loop running the component mainloop
 
 _default_basename = None
 _default_classname = "Tkvue"
@@ -32,6 +57,7 @@ _default_screenname = None
 _default_icons = None
 _default_theme = None
 _default_theme_source = None
+_default_image_cache_size = 64 * 1024 * 1024
 
 
 def attr(widget_cls, attr_name):
@@ -45,11 +71,27 @@ def attr(widget_cls, attr_name):
                 _attrs[(c, attr_name)] = f
         else:
             _attrs[(widget_cls, attr_name)] = f
+        _attrs_cache.clear()
         return f
 
     return decorate
 
 
+def _attr_handler(widget_cls, attr_name):
+    """
+    Return the attribute handler registered for the given widget class or
+    one of it's parent class. Return None if no handler is registered.
+    """
+    key = (widget_cls, attr_name)
+    try:
+        return _attrs_cache[key]
+    except KeyError:
+        pass
+    func = next((_attrs[(c, attr_name)] for c in widget_cls.__mro__ if (c, attr_name) in _attrs), None)
+    _attrs_cache[key] = func
+    return func
+
+
 def widget(widget_name):
     """
     Function decorator to register a widget.
@@ -78,11 +120,15 @@ def configure_tk(
     icon=[],
     theme=None,
     theme_source=None,
+    image_cache_size=64 * 1024 * 1024,
 ):
     """
     Use to configure default instance of Tkinter created by tkvue.
+
+    `image_cache_size` define the number of bytes of unused images kept in memory.
     """
     assert theme_source is None or os.path.isfile(theme_source)
+    assert image_cache_size >= 0
 
     # Disable Tkinter default root creation
     tkinter.NoDefaultRoot()
@@ -93,6 +139,8 @@ def configure_tk(
     _default_icons = icon
     _default_theme = theme
     _default_theme_source = theme_source
+    global _default_image_cache_size
+    _default_image_cache_size = image_cache_size
 
 
 @widget('toplevel')
@@ -172,6 +220,395 @@ def extract_tkvue(fileobj, keywords, comment_tags, options):
         yield entry
 
 
+class _NameCollector(ast.NodeVisitor):
+    """
+    Collect the free names of an expression according to the scope of
+    lambdas and comprehensions.
+    """
+
+    def __init__(self):
+        self.names = set()
+        self.assigned = set()  # Names assigned with `:=`
+        self.scopes = []  # Names bound by each enclosing scope
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load) and not any(node.id in scope for scope in self.scopes):
+            self.names.add(node.id)
+
+    def visit_NamedExpr(self, node):
+        self.visit(node.value)
+        self.assigned.add(node.target.id)
+
+    def visit_Lambda(self, node):
+        # Default values are evaluated in the enclosing scope.
+        for default in node.args.defaults + node.args.kw_defaults:
+            if default is not None:
+                self.visit(default)
+        args = getattr(node.args, "posonlyargs", []) + node.args.args + node.args.kwonlyargs
+        args += [a for a in [node.args.vararg, node.args.kwarg] if a is not None]
+        self.scopes.append({a.arg for a in args})
+        self.visit(node.body)
+        self.scopes.pop()
+
+    def visit_ListComp(self, node):
+        # The first iterable is evaluated in the enclosing scope.
+        self.visit(node.generators[0].iter)
+        scope = set()
+        self.scopes.append(scope)
+        for i, generator in enumerate(node.generators):
+            if i:
+                self.visit(generator.iter)
+            scope.update(n.id for n in ast.walk(generator.target) if isinstance(n, ast.Name))
+            for condition in generator.ifs:
+                self.visit(condition)
+        if isinstance(node, ast.DictComp):
+            self.visit(node.key)
+            self.visit(node.value)
+        else:
+            self.visit(node.elt)
+        self.scopes.pop()
+
+    visit_SetComp = visit_GeneratorExp = visit_DictComp = visit_ListComp
+
+
+class Expression(object):
+    """
+    Compiled expression used for data binding.
+    """
+
+    __slots__ = ["source", "code", "names"]
+
+    def __init__(self, source):
+        assert isinstance(source, str)
+        self.source = source
+        tree = ast.parse(source.strip(), "<tkvue>", "eval")
+        self.code = compile(tree, "<tkvue>", "eval")
+        self.names = self._names(tree)
+
+    @staticmethod
+    def _names(tree):
+        """
+        Return the names that may be read by the expression in any branch.
+        Names bound by comprehensions and lambdas are excluded within their scope.
+        """
+        collector = _NameCollector()
+        collector.visit(tree)
+        return frozenset(collector.names - collector.assigned)
+
+    def __repr__(self):
+        return "<Expression %r>" % self.source
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(source):
+    """
+    Compile the given expression. The most recently used expressions are kept in cache.
+    """
+    return Expression(source)
+
+
+def _binding(value):
+    """
+    Return the compiled expression if the value is a binding `{{ expr }}`.
+    Otherwise return the value as is.
+    """
+    if isinstance(value, str) and value.startswith("{{") and value.endswith("}}"):
+        return _compile(value[2:-2])
+    return value
+
+
+ListSplice = collections.namedtuple("ListSplice", ["index", "removed", "added"])
+ListSplice.__doc__ = "Mutation event of a ReactiveList: `removed` items got replaced by `added` items at `index`."
+
+DictUpdate = collections.namedtuple("DictUpdate", ["key", "value", "deleted"])
+DictUpdate.__doc__ = "Mutation event of a ReactiveDict: `key` got assigned to `value` or got deleted."
+
+
+class _Observable(object):
+    """
+    Mixin used by reactive collections to notify observers of in-place mutations.
+    """
+
+    def subscribe(self, func):
+        """
+        Register a function called with `(collection, event)` on mutation.
+        Bound methods are referenced weakly.
+        """
+        observers = self.__dict__.setdefault("_observers", {})
+        if hasattr(func, "__self__"):
+            observers[(id(func.__self__), func.__func__)] = weakref.WeakMethod(func)
+        else:
+            observers[func] = lambda func=func: func
+
+    def unsubscribe(self, func):
+        observers = self.__dict__.get("_observers", {})
+        if hasattr(func, "__self__"):
+            observers.pop((id(func.__self__), func.__func__), None)
+        else:
+            observers.pop(func, None)
+
+    def __reduce_ex__(self, protocol):
+        # Observers belong to this instance. Copies and pickles start without observers.
+        reduced = list(super().__reduce_ex__(protocol))
+        if len(reduced) > 2 and isinstance(reduced[2], dict) and "_observers" in reduced[2]:
+            reduced[2] = {k: v for k, v in reduced[2].items() if k != "_observers"} or None
+        return tuple(reduced)
+
+    def _before_mutation(self):
+        # Let observers reject the mutation before the collection get updated.
+        if not debug:
+            return
+        for ref in list(self.__dict__.get("_observers", {}).values()):
+            check = getattr(getattr(ref(), "__self__", None), "_check_mutation", None)
+            if check is not None:
+                check(self)
+
+    def _emit(self, event):
+        observers = self.__dict__.get("_observers")
+        if not observers:
+            return
+        for key, ref in list(observers.items()):
+            func = ref()
+            if func is None:
+                del observers[key]
+            else:
+                func(self, event)
+
+
+class ReactiveList(_Observable, list):
+    """
+    List emitting a `ListSplice` event on each in-place mutation. When stored
+    in a `Context`, mutations notify the watchers and `for` loops only
+    create or destroy the affected widgets.
+    """
+
+    def _index(self, index):
+        # Return the positive index used by insert().
+        if index < 0:
+            index += len(self)
+        return max(0, min(index, len(self)))
+
+    def _replace_all(self, func, *args, **kwargs):
+        self._before_mutation()
+        removed = list(self)
+        result = func(self, *args, **kwargs)
+        self._emit(ListSplice(0, removed, list(self)))
+        return result
+
+    def append(self, item):
+        self.insert(len(self), item)
+
+    def insert(self, index, item):
+        index = self._index(index)
+        self._before_mutation()
+        list.insert(self, index, item)
+        self._emit(ListSplice(index, [], [item]))
+
+    def extend(self, items):
+        items = list(items)
+        index = len(self)
+        self._before_mutation()
+        list.extend(self, items)
+        if items:
+            self._emit(ListSplice(index, [], items))
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def __imul__(self, n):
+        return self._replace_all(list.__imul__, n)
+
+    def pop(self, index=-1):
+        if index < 0:
+            index += len(self)
+        self._before_mutation()
+        item = list.pop(self, index)
+        self._emit(ListSplice(index, [item], []))
+        return item
+
+    def remove(self, item):
+        self.pop(self.index(item))
+
+    def clear(self):
+        removed = list(self)
+        self._before_mutation()
+        list.clear(self)
+        if removed:
+            self._emit(ListSplice(0, removed, []))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            start, unused, step = index.indices(len(self))
+            if step != 1:
+                self._replace_all(list.__setitem__, index, value)
+                return
+            removed = list.__getitem__(self, index)
+            self._before_mutation()
+            list.__setitem__(self, index, value)
+            self._emit(ListSplice(start, removed, value))
+        else:
+            if index < 0:
+                index += len(self)
+            removed = list.__getitem__(self, index)
+            self._before_mutation()
+            list.__setitem__(self, index, value)
+            self._emit(ListSplice(index, [removed], [value]))
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            start, unused, step = index.indices(len(self))
+            if step != 1:
+                self._replace_all(list.__delitem__, index)
+                return
+            removed = list.__getitem__(self, index)
+            self._before_mutation()
+            list.__delitem__(self, index)
+            if removed:
+                self._emit(ListSplice(start, removed, []))
+        else:
+            self.pop(index)
+
+    def sort(self, *args, **kwargs):
+        self._replace_all(list.sort, *args, **kwargs)
+
+    def reverse(self):
+        self._replace_all(list.reverse)
+
+
+class ReactiveDict(_Observable, dict):
+    """
+    Dictionary emitting a `DictUpdate` event on each in-place mutation.
+    """
+
+    def __setitem__(self, key, value):
+        self._before_mutation()
+        dict.__setitem__(self, key, value)
+        self._emit(DictUpdate(key, value, False))
+
+    def __delitem__(self, key):
+        self._before_mutation()
+        dict.__delitem__(self, key)
+        self._emit(DictUpdate(key, None, True))
+
+    def pop(self, key, *args):
+        if key not in self:
+            return dict.pop(self, key, *args)
+        self._before_mutation()
+        value = dict.pop(self, key)
+        self._emit(DictUpdate(key, None, True))
+        return value
+
+    def popitem(self):
+        self._before_mutation()
+        key, value = dict.popitem(self)
+        self._emit(DictUpdate(key, None, True))
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        keys = list(self)
+        self._before_mutation()
+        dict.clear(self)
+        for key in keys:
+            self._emit(DictUpdate(key, None, True))
+
+
+class _Batch(object):
+    """
+    Watchers waiting to be notified. Shared by a root context and its children.
+    """
+
+    __slots__ = ["depth", "pending", "thread"]
+
+    def __init__(self):
+        self.depth = 0
+        self.pending = {}
+        self.thread = threading.get_ident()  # UI thread owning the contexts
+
+    def flush(self):
+        # Notify pending watchers once. Computed values are evaluated lazily
+        # when read by the watchers, after their own dependencies, which
+        # follows the topological order of the graph. Watchers may update
+        # the context, so defer those notifications until the current one is completed.
+        self.depth += 1
+        notified = False
+        try:
+            while self.pending:
+                watcher = next(iter(self.pending))
+                subscribed, context, expr = self.pending.pop(watcher)
+                # Check if the watcher is still registered since
+                # the list may get updated during notification.
+                if watcher in subscribed._watchers:
+                    watcher[1](context.eval(expr))
+                    notified = True
+        finally:
+            self.depth -= 1
+        if notified and _wakeups:
+            # Let the event loop redraw the widgets.
+            for wakeup in list(_wakeups):
+                wakeup()
+
+
+class _ThreadUpdates(object):
+    """
+    Context updates made by other threads, waiting to be applied on the UI
+    thread. Updates of the same key are coalesced and applied in a batch.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.loop = None  # Event loop of the UI thread
+
+    def put(self, context, key, value):
+        with self.lock:
+            wakeup = not self.pending
+            self.pending[(id(context), key)] = (context, key, value)
+            loop = self.loop
+        # Wake up the UI thread once for all the pending updates.
+        if wakeup and loop is not None:
+            loop.call_soon_threadsafe(self.apply)
+
+    def discard(self, context, key):
+        """
+        Drop the pending update of the given key, superseded by a newer value.
+        """
+        if self.pending:
+            with self.lock:
+                self.pending.pop((id(context), key), None)
+
+    def apply(self):
+        """
+        Apply the pending updates. Must be called from the UI thread.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        batches = {}
+        for context, key, value in pending.values():
+            batches.setdefault(id(context._batch), []).append((context, key, value))
+        for updates in batches.values():
+            with updates[0][0].batch():
+                for context, key, value in updates:
+                    context[key] = value
+
+
+_thread_updates = _ThreadUpdates()
+
+
 class Context(collections.abc.MutableMapping):
     def __init__(self, initial_data={}, parent=None):
         "Create a new root context"
@@ -184,9 +621,21 @@ class Context(collections.abc.MutableMapping):
         self._parent = parent
         self._maps = [self._map]
         self._track = None
-        self._watchers = {}
+        self._watchers = {}  # Dependencies of each watcher declared in this context.
+        self._subscribers = {}  # Watchers subscribed to each key of this context.
+        self._dependents = {}  # Computed values depending on each key of this context.
+        self._cache = {}  # Cached value of computed attributes.
+        self._computed_deps = {}  # Dependencies of each cached computed attribute.
+        self._owners = {}  # Context declaring each key, None when undefined.
+        self._children = weakref.WeakValueDictionary()
+        for value in self._map.values():
+            self._observe(value)
         if self._parent is not None:
             self._maps += self._parent._maps
+            self._parent._children[id(self)] = self
+            self._batch = self._parent._batch
+        else:
+            self._batch = _Batch()
 
     def new_child(self, **kwargs):
         "Make a child context, inheriting enable_nonlocal unless specified"
@@ -203,23 +652,154 @@ class Context(collections.abc.MutableMapping):
 
     set = __setattr__
 
+    def set_threadsafe(self, key, value):
+        """
+        Update the given key from any thread. When called from another
+        thread, the update is queued and applied later on the UI thread by
+        the component mainloop.
+        """
+        if threading.get_ident() == self._batch.thread:
+            _thread_updates.discard(self, key)
+            self[key] = value
+        else:
+            _thread_updates.put(self, key, value)
+
+    def _lookup(self, key):
+        """
+        Return the context declaring the given key or None if undefined.
+        Lookups are cached for each context, so resolution doesn't depend on
+        the depth of the context.
+        """
+        try:
+            return self._owners[key]
+        except KeyError:
+            pass
+        if key in self._map:
+            context = self
+        elif self._parent is not None:
+            context = self._parent._lookup(key)
+        else:
+            context = None
+        self._owners[key] = context
+        return context
+
+    def _clear_owners(self):
+        # Called when keys are added or removed.
+        self._owners.clear()
+        for child in list(self._children.values()):
+            child._clear_owners()
+
     def __getitem__(self, key):
-        for m in self._maps:
-            if key in m:
-                break
-        value = m[key]
+        try:
+            context = self._owners[key]
+        except KeyError:
+            context = self._lookup(key)
+        if context is None:
+            raise KeyError(key)
+        value = context._map[key]
         if hasattr(value, "__computed__"):
-            return value(self)
-        else:
-            if self._track is not None:
-                self._track.append(key)
-            return value
+            context, value = self._computed(key, value, context)
+        if self._track is not None:
+            self._track.append((context, key))
+        return value
+
+    def _computed(self, key, func, owner):
+        """
+        Return the context caching the computed attribute declared by `owner`
+        and its value. The function is evaluated against this context, so it
+        may read keys of child contexts like loop variables. The value is
+        cached on the deepest context declaring one of the keys it reads and
+        invalidated when one of them changes.
+        """
+        context = self
+        while True:
+            if key in context._cache and (context is self or not self._shadows(context, key)):
+                return context, context._cache[key]
+            if context is owner:
+                break
+            context = context._parent
+        track, self._track = self._track, []
+        try:
+            value = func(self)
+            dependencies = list({(id(c), d): (c, d) for c, d in self._track}.values())
+        finally:
+            self._track = track
+        # Cache the value on the deepest context declaring a dependency.
+        context = self
+        while context is not owner and not any(c is context for c, d in dependencies):
+            context = context._parent
+        context._uncache(key)
+        context._cache[key] = value
+        context._computed_deps[key] = dependencies
+        for c, d in dependencies:
+            c._dependents.setdefault(d, {})[(id(context), key)] = context
+        return context, value
+
+    def _shadows(self, context, key):
+        # Return True if a context in between declares a key read by the
+        # computed attribute cached by the given context.
+        names = set()
+        stack = [(context, key)]
+        while stack:
+            c, k = stack.pop()
+            for c, d in c._computed_deps[k]:
+                if d in c._computed_deps:
+                    stack.append((c, d))
+                else:
+                    names.add(d)
+        child = self
+        while child is not context:
+            if not names.isdisjoint(child._map):
+                return True
+            child = child._parent
+        return False
+
+    def _uncache(self, key):
+        # Drop the cached value of a computed attribute and its dependencies.
+        if key not in self._cache:
+            return False
+        del self._cache[key]
+        for context, d in self._computed_deps.pop(key, []):
+            dependents = context._dependents.get(d)
+            if dependents:
+                dependents.pop((id(self), key), None)
+                if not dependents:
+                    del context._dependents[d]
+        return True
+
+    def _invalidate(self, key):
+        """
+        Drop the cached value of a computed attribute and propagate to
+        everything depending on it.
+        """
+        if not self._uncache(key):
+            return
+        self._propagate(key)
+        # Watchers are subscribed on the context declaring the computed
+        # attribute. Queue those reading it through this context.
+        owner = self._lookup(key)
+        if owner is None or owner is self:
+            return
+        subscribers = owner._subscribers.get(key)
+        if subscribers:
+            pending = self._batch.pending
+            for watcher, (context, expr) in subscribers.items():
+                if self._is_parent_of(context):
+                    pending[watcher] = (owner, context, expr)
+
+    def _is_parent_of(self, context):
+        # Return True if this context is the given context or one of its parents.
+        while context is not None and context is not self:
+            context = context._parent
+        return context is self
 
     def __setitem__(self, key, value):
         assert hasattr(value, "__hash__"), "unhashable type '%s' for key %s" % (
             type(value),
             key,
         )
+        if debug:
+            self._check_thread(key)
         # Dispatch setter to parent context
         if key not in self._map and self._parent:
             self._parent.__setitem__(key, value)
@@ -231,12 +811,56 @@ class Context(collections.abc.MutableMapping):
             raise ValueError("cannot set computed attribute")
         # Save the new value.
         self._map[key] = value
+        if prev_value is value:
+            return
+        self._unobserve(prev_value)
+        self._observe(value)
         # If value changed, notify
         if prev_value != value:
             self._notify(key, value)
 
+    def setdefault(self, key, default=None):
+        """
+        Declare the key in this context if not already defined and return its value.
+        """
+        if key not in self:
+            self._map[key] = default
+            self._observe(default)
+            self._clear_owners()
+        return self[key]
+
     def __delitem__(self, key):
-        del self._map[key]
+        value = self._map.pop(key)
+        self._unobserve(value)
+        self._clear_owners()
+        self._invalidate(key)
+
+    def _observe(self, value):
+        # Get notified of in-place mutations of reactive collections.
+        if isinstance(value, _Observable):
+            value.subscribe(self._on_mutation)
+
+    def _unobserve(self, value):
+        if isinstance(value, _Observable) and not any(v is value for v in self._map.values()):
+            value.unsubscribe(self._on_mutation)
+
+    def _check_mutation(self, collection):
+        # Called by reactive collections before being mutated.
+        for key, value in self._map.items():
+            if value is collection:
+                self._check_thread(key)
+
+    def _on_mutation(self, collection, event):
+        for key, value in list(self._map.items()):
+            if value is collection:
+                self._notify(key, value)
+
+    def _check_thread(self, key):
+        # Raise an error before anything get updated.
+        if threading.get_ident() != self._batch.thread:
+            raise RuntimeError(
+                "context updated outside of the UI thread: %s, use set_threadsafe() from other threads" % key
+            )
 
     def __len__(self):
         return sum(map(len, self._maps))
@@ -244,33 +868,74 @@ class Context(collections.abc.MutableMapping):
     def __iter__(self, chain_from_iterable=chain.from_iterable):
         return chain_from_iterable(self._maps)
 
-    def __contains__(self, key, any=any):
-        return any(key in m for m in self._maps)
+    def __contains__(self, key):
+        return self._lookup(key) is not None
 
     def __repr__(self, repr=repr):
         return " -> ".join(map(repr, self._maps))
 
     def _notify(self, key, new):
-        # Notify watchers.
-        items = list(self._watchers.items())
-        for (expr, func), (dependencies, context) in items:
-            # Check if dependencies matches our key
-            # Also check if the watcher is still in the list since
-            # the list may get updated during notification.
-            if key in dependencies and (expr, func) in self._watchers:
-                func(context.watch(expr, func))
+        # Propagate the change through the whole dependency graph before
+        # notifying any watcher. This way, watchers never see a mix of stale
+        # and fresh computed values.
+        batch = self._batch
+        batch.depth += 1
+        try:
+            self._propagate(key)
+        finally:
+            batch.depth -= 1
+        if not batch.depth and batch.pending:
+            batch.flush()
+
+    def _propagate(self, key):
+        # Invalidate computed attributes depending on this key. Those already
+        # invalidated are skipped, so each node of the graph is visited once.
+        dependents = self._dependents.get(key)
+        if dependents:
+            for (unused, computed_key), context in list(dependents.items()):
+                context._invalidate(computed_key)
+        # Queue watchers subscribed to this key.
+        subscribers = self._subscribers.get(key)
+        if subscribers:
+            pending = self._batch.pending
+            for watcher, (context, expr) in subscribers.items():
+                pending[watcher] = (self, context, expr)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Defer watchers notification until the end of the block. Each watcher
+        get notified once with the final value. Could be nested or used as
+        a function decorator.
+
+            with data.batch():
+                data.var1 = 1
+                data.var2 = 2
+        """
+        batch = self._batch
+        batch.depth += 1
+        try:
+            yield self
+        finally:
+            batch.depth -= 1
+            if not batch.depth:
+                batch.flush()
 
     def eval(self, expr, **kwargs):
         """
-        Evaluate the given expression.
+        Evaluate the given expression. `expr` may be a string or a compiled `Expression`.
         """
         if kwargs:
             return self.new_child(**kwargs).eval(expr)
         else:
             try:
-                return eval(expr, None, self)
+                if not isinstance(expr, Expression):
+                    expr = _compile(expr)
+                return eval(expr.code, None, self)
             except Exception as e:
-                raise Exception("exception occured while evaluating expression `%s`" % expr) from e
+                raise Exception(
+                    "exception occured while evaluating expression `%s`" % getattr(expr, 'source', expr)
+                ) from e
 
     def watch(self, expr, func):
         """
@@ -278,31 +943,40 @@ class Context(collections.abc.MutableMapping):
         """
         assert expr
         assert func and hasattr(func, "__call__")
-        if expr in self._map and not hasattr(self._map[expr], "__computed__"):
-            dependencies = set([expr])
-            v = self.get(expr)
-        else:
-            self._track = []
-            v = self.eval(expr)
-            dependencies = set(self._track)
-            self._track = None
+        if not isinstance(expr, Expression):
+            expr = _compile(expr)
+        v = self.eval(expr)
         # Register watchers on appropriate context depending where variable is declared
+        watcher = (expr.source, func)
         context = self
         while context:
-            dep = [d for d in dependencies if d in context._map]
+            context._unsubscribe(watcher)
+            dep = [d for d in expr.names if d in context._map]
             if dep:
-                context._watchers[(expr, func)] = (dep, self)
+                context._watchers[watcher] = dep
+                for d in dep:
+                    context._subscribers.setdefault(d, {})[watcher] = (self, expr)
             context = context._parent
         return v
 
+    def _unsubscribe(self, watcher):
+        """
+        Remove the watcher from the subscribers of this context.
+        """
+        for d in self._watchers.pop(watcher, []):
+            subscribers = self._subscribers[d]
+            del subscribers[watcher]
+            if not subscribers:
+                del self._subscribers[d]
+
     def unwatch(self, expr, func):
         """
         Removing associated watchers.
         """
+        watcher = (getattr(expr, 'source', expr), func)
         context = self
         while context:
-            if (expr, func) in context._watchers:
-                del context._watchers[(expr, func)]
+            context._unsubscribe(watcher)
             context = context._parent
 
     def __bool__(self):
@@ -343,133 +1017,620 @@ def _configure_selected(widget, value):
     widget.state(["selected" if value else "!selected", "!alternate"])
 
 
-@attr(ttk.Widget, "image")
-def _configure_image(widget, image_path):
+_image_executor = None
+
+
+def _get_image_executor():
     """
-    Configure the image attribute of a Label or a Button.
+    Return the executor used to decode images.
+    """
+    global _image_executor
+    if _image_executor is None:
+        _image_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="tkvue-image")
+    return _image_executor
+
+
+def _decode_image(path):
+    """
+    Read and decode the image file. Executed in a worker thread, so it must
+    not call Tk. Without Pillow, the file is only read and decoding is left to Tk.
+    """
+    if Image is None:
+        with open(path, "rb") as f:
+            data = f.read()
+        return data, _gif_durations(data)
+    frames = []
+    durations = []
+    with Image.open(path) as image:
+        # The iterator moves the same image to the next frame.
+        for frame in ImageSequence.Iterator(image):
+            frames.append(frame.convert("RGBA"))
+            durations.append(frame.info.get("duration", None))
+    return frames, durations
+
+
+def _gif_durations(data):
+    """
+    Return the duration in milliseconds of each frame of a GIF image as
+    defined by the Graphic Control Extension. Duration is None when undefined.
+    """
+    if data[:3] != b"GIF" or len(data) < 13:
+        return None
+
+    def skip_sub_blocks(pos):
+        while pos < len(data) and data[pos]:
+            pos += data[pos] + 1
+        return pos + 1
+
+    durations = []
+    delay = None
+    pos = 13
+    if data[10] & 0x80:
+        # Skip global color table
+        pos += 3 * (2 ** ((data[10] & 0x07) + 1))
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x21 and pos + 1 < len(data):
+            # Extension
+            if data[pos + 1] == 0xF9 and pos + 5 < len(data):
+                # Delay is defined in hundredths of a second.
+                delay = (data[pos + 4] | data[pos + 5] << 8) * 10
+            pos = skip_sub_blocks(pos + 2)
+        elif block == 0x2C and pos + 9 < len(data):
+            # Image descriptor, skip local color table and image data.
+            flags = data[pos + 9]
+            pos += 10
+            if flags & 0x80:
+                pos += 3 * (2 ** ((flags & 0x07) + 1))
+            pos = skip_sub_blocks(pos + 1)
+            durations.append(delay or None)
+            delay = None
+        else:
+            # Trailer or corrupted data
+            break
+    return durations
 
-    Support animated gif image.
+
+class ImageCache(object):
+    """
+    Images shared by every widget of a Tk root.
+
+    Images are identified by path and modification time and are reference
+    counted. Images no longer used by any widget are kept until the total size
+    exceed `max_size`, then the least recently used are freed.
     """
 
-    def _next_frame():
-        widget.frame = (widget.frame + 1) % len(widget.frames)
-        if widget.winfo_ismapped():
-            widget.configure(image=widget.frames[widget.frame])
-        # Register next animation.
-        widget._event_id = widget.after(150, _next_frame)
+    poll_interval = 20
 
-    def _stop_animation(unused=None):
-        if getattr(widget, "_func_id", None):
-            widget.unbind("<Destroy>", widget._func_id)
-            del widget._func_id
+    def __init__(self, master, max_size=None):
+        self.master = master
+        self.max_size = _default_image_cache_size if max_size is None else max_size
+        self.size = 0
+        self.entries = {}  # key -> [frames, refs, size, durations]
+        self.unused = collections.OrderedDict()  # keys of unused entries in LRU order
+        self.loading = {}  # key -> [future, callbacks]
+        self.polling = False
+        self.timer = None  # Identifier and deadline in ms of the polling timer
+        self.deadline = None
+
+    def _key(self, path):
+        base, region = _split_region(path)
+        try:
+            return (os.path.abspath(base) + region, os.stat(base).st_mtime_ns)
+        except OSError:
+            return (path, None)
 
-        if getattr(widget, "_event_id", None):
-            widget.after_cancel(widget._event_id)
-            del widget._event_id
+    def _add(self, key, frames, durations=None):
+        entry = self.entries[key] = [frames, 0, sum(f.width() * f.height() * 4 for f in frames), durations]
+        self.size += entry[2]
 
-    def _start_animation(unused=None):
-        if not getattr(widget, "_event_id", None):
-            widget._event_id = widget.after(100, _next_frame)
-        if not getattr(widget, "_func_id", None):
-            widget._func_id = widget.bind("<Destroy>", _stop_animation)
+    def _ref(self, key):
+        entry = self.entries[key]
+        entry[1] += 1
+        self.unused.pop(key, None)
+        return entry[0]
 
-    # Create a new image
-    if not image_path:
-        # Remove image
-        widget.frames = []
-    elif image_path.endswith(".gif"):
-        widget.frames = []
+    def acquire(self, path):
+        """
+        Return the key and the frames of the image. Every call must be paired
+        with a call to `release(key)`.
+        """
+        key = self._key(path)
+        if key not in self.entries:
+            base, region = _split_region(path)
+            if region:
+                # Decode the sheet once and slice it.
+                sheet_key, sheet = self.acquire(base)
+                try:
+                    self._add(key, self._slice(sheet[0], base, region))
+                finally:
+                    self.release(sheet_key)
+            else:
+                durations = None
+                if path.endswith(".gif"):
+                    with open(path, "rb") as f:
+                        durations = _gif_durations(f.read())
+                self._add(key, self._load(path), durations)
+        return key, self._ref(key)
+
+    def durations(self, key):
+        """
+        Return the duration of each frame in milliseconds or None when undefined.
+        """
+        entry = self.entries.get(key, None)
+        return entry[3] if entry else None
+
+    def acquire_async(self, path, callback):
+        """
+        Read and decode the image in a worker thread then call
+        `callback(key, frames)` from the UI thread. Every callback must be
+        paired with a call to `release(key)`. Return a function to cancel the
+        loading or None if the image was already loaded.
+        """
+        key = self._key(path)
+        if key in self.entries:
+            callback(key, self._ref(key))
+            return None
+        base, region = _split_region(path)
+        if region:
+
+            def sliced(sheet_key, sheet):
+                try:
+                    if key not in self.entries:
+                        self._add(key, self._slice(sheet[0], base, region))
+                finally:
+                    self.release(sheet_key)
+                callback(key, self._ref(key))
+
+            return self.acquire_async(base, sliced)
+        pending = self.loading.get(key, None)
+        if pending is None:
+            pending = self.loading[key] = [_get_image_executor().submit(_decode_image, path), []]
+            if not self.polling:
+                self.polling = True
+                self._schedule_poll()
+        pending[1].append(callback)
+
+        def cancel():
+            if callback in pending[1]:
+                pending[1].remove(callback)
+            # Forget the cancelled future so the next request submit a new one.
+            if not pending[1] and pending[0].cancel() and self.loading.get(key, None) is pending:
+                del self.loading[key]
+
+        return cancel
+
+    def _poll(self):
+        """
+        Create the images decoded by worker threads.
+        """
+        self.timer = None
+        for key, (future, callbacks) in list(self.loading.items()):
+            if not future.done():
+                continue
+            del self.loading[key]
+            if future.cancelled():
+                continue
+            try:
+                if key not in self.entries:
+                    data, durations = future.result()
+                    self._add(key, self._load(data=data), durations)
+            except Exception:
+                logger.warning("fail to load image %s", key[0], exc_info=1)
+                continue
+            for callback in callbacks:
+                callback(key, self._ref(key))
+            if self.entries[key][1] <= 0:
+                self.unused[key] = True
+                self._evict()
+        self.polling = bool(self.loading)
+        if self.polling:
+            self._schedule_poll()
+
+    def _schedule_poll(self):
+        self.deadline = time.monotonic() * 1000 + self.poll_interval
+        self.timer = self.master.after(self.poll_interval, self._poll)
+
+    def release(self, key):
+        """
+        Release an image previously acquired.
+        """
+        entry = self.entries.get(key, None)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            self.unused[key] = True
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_size and self.unused:
+            key, unused = self.unused.popitem(last=False)
+            entry = self.entries.pop(key)
+            self.size -= entry[2]
+
+    def _load(self, path=None, data=None):
+        """
+        Create the frames of the image from a file or from the data returned
+        by `_decode_image`.
+        """
+        if data is not None and not isinstance(data, bytes):
+            # Already decoded by Pillow.
+            return [ImageTk.PhotoImage(image, master=self.master) for image in data]
+        if data is None:
+            source, animated = {"file": path}, path.endswith(".gif")
+        else:
+            source, animated = {"data": data}, data[:3] == b"GIF"
+        if not animated:
+            return [tkinter.PhotoImage(master=self.master, **source)]
+        frames = []
         while True:
             try:
                 image = tkinter.PhotoImage(
-                    master=widget,
-                    file=image_path,
-                    format="gif -index %i" % len(widget.frames),
+                    master=self.master,
+                    format="gif -index %i" % len(frames),
+                    **source,
                 )
-                widget.frames.append(image)
+                frames.append(image)
             except tkinter.TclError:
                 # An error is raised when the index is out of range.
                 break
-    elif image_path in widget.image_names():
-        widget.frames = [image_path]
-    elif f"{image_path}_00" in widget.image_names():
-        widget.frames = sorted([name for name in widget.image_names() if name.startswith(f"{image_path}_")])
-    else:
-        widget.frames = [tkinter.PhotoImage(master=widget, file=image_path)]
+        return frames
 
-    # Update widget image with first frame.
-    widget.frame = 0
-    widget.configure(image=widget.frames[0] if widget.frames else '')
+    def _slice(self, sheet, path, region):
+        """
+        Copy the regions of the sheet into new images.
+        """
+        match = re.fullmatch(r"(\d+)x(\d+)(?::(\d+))?", region[1:])
+        if match:
+            # Sprite sheet with frames of the same size.
+            width, height = int(match.group(1)), int(match.group(2))
+            columns, rows = sheet.width() // width, sheet.height() // height
+            regions = [(c * width, r * height, width, height) for r in range(rows) for c in range(columns)]
+            if match.group(3) is not None:
+                index = int(match.group(3))
+                if index >= len(regions):
+                    raise ValueError("frame %s out of range of %s: %s" % (index, path, region[1:]))
+                regions = [regions[index]]
+        else:
+            # Named region
+            atlas = _atlases.get(os.path.abspath(path), {})
+            if region[1:] not in atlas:
+                raise ValueError("%s is not defined in atlas %s" % (region[1:], path))
+            regions = [atlas[region[1:]]]
+        frames = []
+        for x, y, width, height in regions:
+            image = tkinter.PhotoImage(master=self.master, width=width, height=height)
+            image.tk.call(str(image), "copy", str(sheet), "-from", x, y, x + width, y + height)
+            frames.append(image)
+        return frames
 
-    if len(widget.frames) > 1:
-        _start_animation()
-    else:
-        _stop_animation()
 
+_sheet_region = re.compile(r"\d+x\d+(:\d+)?")
 
-@attr(ttk.Label, "wrap")
-def _configure_wrap(widget, wrap):
-    # Support Text wrapping
-    if wrap.lower() in ["true", "1"]:
-        widget.bind(
-            "<Configure>",
-            lambda e: widget.configure(wraplength=widget.winfo_width()),
-            add="+",
-        )
 
+def _split_region(path):
+    """
+    Split the image path from the region of a sprite sheet or an atlas:
+    `<path>#<width>x<height>` for every frames of the sheet,
+    `<path>#<width>x<height>:<index>` for a single frame and
+    `<path>#<name>` for a region registered with `register_atlas()`.
+    """
+    base, sep, region = path.rpartition("#")
+    if not base or not region:
+        return path, ""
+    # Otherwise `#` is part of the file name.
+    if not _sheet_region.fullmatch(region) and region not in _atlases.get(os.path.abspath(base), ()):
+        return path, ""
+    return base, sep + region
 
-@attr(tkinter.Tk, "theme")
-def _configure_theme(widget, value):
-    # Defined on TopLevel
-    ttk.Style(master=widget).theme_use(value)
 
+def register_atlas(path, regions):
+    """
+    Register named regions `{name: (x, y, width, height)}` of an image. Use
+    `image="<path>#<name>"` to display a region.
+    """
+    _atlases.setdefault(os.path.abspath(path), {}).update(regions)
 
-@widget("tooltip")
-class ToolTip(ttk.Frame):
+
+def image_cache(widget):
     """
-    Tooltip widget.
+    Return the image cache of the Tk root of the given widget.
     """
+    root = widget._root()
+    cache = getattr(root, "_image_cache", None)
+    if cache is None:
+        cache = root._image_cache = ImageCache(root)
+    return cache
 
-    def __init__(self, master, text="", timeout=400, width=None, **kwargs):
-        assert master, "ToolTip widget required a master widget"
-        assert timeout >= 0, "timeout should be greater or equals zero (0): %s" % timeout
-        assert width is None or width > 0, "timeout should be greater than zero (0): %s" % width
-        super().__init__(master, **kwargs)
-        self.widget = master
-        self.text = text
-        self.width = width
-        # Initialize internal variables
-        self.tipwindow = None  # tooltip window.
-        self.id = None  # event id
-        self.x = self.y = 0
-        self.timeout = timeout  # time in milliseconds before tooltip get displayed
-        # Bind events to master
-        self.master.bind("<Enter>", self.enter)
-        self.master.bind("<Leave>", self.leave)
-        self.master.bind("<ButtonPress>", self.leave)
 
-    def enter(self, event=None):
-        self.x = event.x
-        self.y = event.y
-        self.schedule()
+def _release_image(widget):
+    cancel = getattr(widget, "_image_cancel", None)
+    if cancel is not None:
+        widget._image_cancel = None
+        cancel()
+    key = getattr(widget, "_image_key", None)
+    if key is not None:
+        widget._image_key = None
+        image_cache(widget).release(key)
 
-    def leave(self, event=None):
-        self.unschedule()
-        self.hidetip()
 
-    def schedule(self):
-        self.unschedule()
-        self.id = self.master.after(self.timeout, self.showtip)
+class AnimationClock(object):
+    """
+    Advance every animated image of a Tk root from a single timer.
 
-    def unschedule(self):
-        if self.id:
-            self.master.after_cancel(self.id)
-        self.id = None
+    Animations of widgets that are not viewable (unmapped or within a
+    minimized window) are suspended until a window get mapped again.
+    """
 
-    def showtip(self):
-        if self.tipwindow:
+    default_duration = 150
+
+    def __init__(self, master):
+        self.master = master
+        self.animations = {}  # widget -> next frame deadline in ms or None when suspended
+        self.suspended = 0
+        self.toplevels = set()
+        self.timer = None
+        self.deadline = None
+
+    def add(self, widget):
+        """
+        Start animating the frames of the widget.
+        """
+        if widget not in self.animations:
+            toplevel = widget.winfo_toplevel()
+            if str(toplevel) not in self.toplevels:
+                # Map events of every child widget are received by the toplevel.
+                self.toplevels.add(str(toplevel))
+                toplevel.bind("<Map>", self._resume, add="+")
+            if not getattr(widget, "_animation_destroy_id", None):
+                widget._animation_destroy_id = widget.bind("<Destroy>", lambda event: self.remove(widget), add="+")
+        elif self.animations[widget] is None:
+            self.suspended -= 1
+        self.animations[widget] = self._now() + self._duration(widget)
+        self._schedule()
+
+    def remove(self, widget):
+        """
+        Stop animating the widget.
+        """
+        if widget in self.animations and self.animations.pop(widget) is None:
+            self.suspended -= 1
+
+    def _now(self):
+        return time.monotonic() * 1000
+
+    def _duration(self, widget):
+        durations = getattr(widget, "durations", None)
+        if durations and widget.frame < len(durations) and durations[widget.frame]:
+            return durations[widget.frame]
+        return self.default_duration
+
+    def _resume(self, event=None):
+        if not self.suspended:
             return
-        x = self.master.winfo_rootx() + self.x + 5
+        now = self._now()
+        for widget, deadline in self.animations.items():
+            if deadline is None:
+                self.animations[widget] = now
+        self.suspended = 0
+        self._schedule()
+
+    def _schedule(self):
+        deadlines = [d for d in self.animations.values() if d is not None]
+        if not deadlines:
+            return
+        deadline = min(deadlines)
+        if self.timer is not None:
+            if self.deadline <= deadline:
+                return
+            self.master.after_cancel(self.timer)
+        self.deadline = deadline
+        self.timer = self.master.after(max(1, int(deadline - self._now())), self._tick)
+
+    def _tick(self):
+        self.timer = None
+        now = self._now()
+        for widget, deadline in list(self.animations.items()):
+            if deadline is None or deadline > now:
+                continue
+            try:
+                if not widget.winfo_viewable():
+                    self.animations[widget] = None
+                    self.suspended += 1
+                    continue
+                widget.frame = (widget.frame + 1) % len(widget.frames)
+                widget.configure(image=widget.frames[widget.frame])
+            except tkinter.TclError:
+                # Widget was destroyed.
+                self.remove(widget)
+                continue
+            self.animations[widget] = now + self._duration(widget)
+        self._schedule()
+
+
+def animation_clock(widget):
+    """
+    Return the animation clock of the Tk root of the given widget.
+    """
+    root = widget._root()
+    clock = getattr(root, "_animation_clock", None)
+    if clock is None:
+        clock = root._animation_clock = AnimationClock(root)
+    return clock
+
+
+def _stop_animation(widget):
+    if getattr(widget, "_animated", False):
+        widget._animated = False
+        animation_clock(widget).remove(widget)
+
+
+def _start_animation(widget):
+    widget._animated = True
+    animation_clock(widget).add(widget)
+
+
+def _set_image(widget, key, frames):
+    """
+    Display the given frames and release the previous image.
+    """
+    previous_key = getattr(widget, "_image_key", None)
+    widget._image_key = key
+
+    # Update widget image with first frame.
+    widget.frames = frames
+    widget.durations = image_cache(widget).durations(key) if key is not None else None
+    widget.frame = 0
+    widget.configure(image=widget.frames[0] if widget.frames else '')
+    if previous_key is not None:
+        image_cache(widget).release(previous_key)
+
+    if len(widget.frames) > 1:
+        _start_animation(widget)
+    else:
+        _stop_animation(widget)
+
+
+def _named_frames(widget, image_path):
+    """
+    Return the frames of an image created with the given name. Return None
+    if the image was not created.
+    """
+    if image_path.endswith(".gif"):
+        return None
+    names = widget.image_names()
+    if image_path in names:
+        return [image_path]
+    if f"{image_path}_00" in names:
+        return sorted([name for name in names if name.startswith(f"{image_path}_")])
+    return None
+
+
+def _show_image(widget, image_path):
+    if not image_path:
+        # Remove image
+        _set_image(widget, None, [])
+        return
+    frames = _named_frames(widget, image_path)
+    if frames is not None:
+        _set_image(widget, None, frames)
+        return
+    # Share image file with other widgets.
+    key, frames = image_cache(widget).acquire(image_path)
+    _set_image(widget, key, frames)
+
+
+def _image_loaded(widget, key, frames):
+    widget._image_cancel = None
+    _set_image(widget, key, frames)
+
+
+@attr(ttk.Widget, "image")
+def _configure_image(widget, image_path):
+    """
+    Configure the image attribute of a Label or a Button.
+
+    Support animated gif image. When `loading="async"`, image files are
+    decoded in a worker thread while the `placeholder` image is displayed.
+    """
+    # Cancel previous loading.
+    cancel = getattr(widget, "_image_cancel", None)
+    if cancel is not None:
+        widget._image_cancel = None
+        cancel()
+    if not getattr(widget, "_image_release_id", None):
+        widget._image_release_id = widget.bind("<Destroy>", lambda event: _release_image(widget), add="+")
+
+    if image_path and getattr(widget, "_image_loading", "sync") == "async" and not _named_frames(widget, image_path):
+        _show_image(widget, getattr(widget, "_image_placeholder", None))
+        widget._image_cancel = image_cache(widget).acquire_async(
+            image_path, lambda key, frames: _image_loaded(widget, key, frames)
+        )
+    else:
+        _show_image(widget, image_path)
+
+
+@attr(ttk.Widget, "loading")
+def _configure_loading(widget, value):
+    """
+    Define how image files get loaded: `sync` (default) or `async`.
+    """
+    assert value in ["sync", "async"], f"{value} should be `sync` or `async`"
+    widget._image_loading = value
+
+
+@attr(ttk.Widget, "placeholder")
+def _configure_placeholder(widget, value):
+    """
+    Image displayed while the image get loaded asynchronously.
+    """
+    widget._image_placeholder = value
+
+
+@attr(ttk.Label, "wrap")
+def _configure_wrap(widget, wrap):
+    # Support Text wrapping
+    if wrap.lower() in ["true", "1"]:
+        widget.bind(
+            "<Configure>",
+            lambda e: widget.configure(wraplength=widget.winfo_width()),
+            add="+",
+        )
+
+
+@attr(tkinter.Tk, "theme")
+def _configure_theme(widget, value):
+    # Defined on TopLevel
+    ttk.Style(master=widget).theme_use(value)
+
+
+@widget("tooltip")
+class ToolTip(ttk.Frame):
+    """
+    Tooltip widget.
+    """
+
+    def __init__(self, master, text="", timeout=400, width=None, **kwargs):
+        assert master, "ToolTip widget required a master widget"
+        assert timeout >= 0, "timeout should be greater or equals zero (0): %s" % timeout
+        assert width is None or width > 0, "timeout should be greater than zero (0): %s" % width
+        super().__init__(master, **kwargs)
+        self.widget = master
+        self.text = text
+        self.width = width
+        # Initialize internal variables
+        self.tipwindow = None  # tooltip window.
+        self.id = None  # event id
+        self.x = self.y = 0
+        self.timeout = timeout  # time in milliseconds before tooltip get displayed
+        # Bind events to master
+        self.master.bind("<Enter>", self.enter)
+        self.master.bind("<Leave>", self.leave)
+        self.master.bind("<ButtonPress>", self.leave)
+
+    def enter(self, event=None):
+        self.x = event.x
+        self.y = event.y
+        self.schedule()
+
+    def leave(self, event=None):
+        self.unschedule()
+        self.hidetip()
+
+    def schedule(self):
+        self.unschedule()
+        self.id = self.master.after(self.timeout, self.showtip)
+
+    def unschedule(self):
+        if self.id:
+            self.master.after_cancel(self.id)
+        self.id = None
+
+    def showtip(self):
+        if self.tipwindow:
+            return
+        x = self.master.winfo_rootx() + self.x + 5
         y = self.master.winfo_rooty() + self.y + 5
         self.tipwindow = tkinter.Toplevel(self.master)
         try:
@@ -537,9 +1698,43 @@ class ToolTip(ttk.Frame):
         self.widget.event_generate(*args, **kwargs)
 
 
+def _longest_increasing_subsequence(seq):
+    """
+    Return the positions in `seq` forming the longest strictly increasing
+    subsequence. Negative values are ignored.
+    """
+    tails = []  # Value of the smallest tail of each subsequence length.
+    tails_pos = []  # Position of those tails in `seq`.
+    previous = [-1] * len(seq)
+    for pos, value in enumerate(seq):
+        if value < 0:
+            continue
+        i = bisect.bisect_left(tails, value)
+        if i > 0:
+            previous[pos] = tails_pos[i - 1]
+        if i == len(tails):
+            tails.append(value)
+            tails_pos.append(pos)
+        else:
+            tails[i] = value
+            tails_pos[i] = pos
+    result = set()
+    pos = tails_pos[-1] if tails_pos else -1
+    while pos >= 0:
+        result.add(pos)
+        pos = previous[pos]
+    return result
+
+
 class Loop:
     """
     Pseudo widget used to handle for loops.
+
+    When the element define a `key` attribute, widgets are identified by key.
+    Existing widgets get reused and moved when the list is updated.
+
+    When the list is a `ReactiveList`, in-place mutations only create or
+    destroy the widgets of the affected items.
     """
 
     def __init__(self, tree, for_expr, master, context, widget_factory):
@@ -547,48 +1742,284 @@ class Loop:
         assert " in " in for_expr, "for expression must have the for <target> in <list>"
         assert master
         assert context
-        self.tree = tree.copy()
-        self.tree.attrs.pop("for", "None")
+        self.tree = tree.loop_body()
+        key = tree.attrs.get("key", None)
+        if key is not None:
+            assert key.startswith("{{") and key.endswith("}}"), "key attribute must be a binding: " + key
+            key = _compile(key[2:-2])
+        self.loop_key = key
         self.master = master
         self.context = context
         self.widget_factory = widget_factory
-        self.idx = 0
         self.widgets = []
+        self.contexts = []  # Context of each widget.
+        self.keys = []  # Key of each widget when `key` is defined.
+        self.items = None  # Reactive collection observed by this loop.
         # Validate expression by evaluating it.
-        self.loop_target, unused, self.loop_items = for_expr.partition(" in ")
+        self.loop_target, unused, loop_items = for_expr.partition(" in ")
+        self.loop_target = self.loop_target.strip()
+        self.loop_items = _compile(loop_items)
         items = context.eval(self.loop_items)
         # Register our self
         context.watch(self.loop_items, self.update_items)
         # Children shildren
         self.update_items(items)
 
-    def create_widget(self, idx):
-        child_var = {self.loop_target: computed(lambda context: context.eval(self.loop_items)[idx])}
-        child_context = self.context.new_child(**child_var)
-        return self.widget_factory(master=self.master, tree=self.tree, context=child_context)
+    def create_widget(self, item):
+        child_context = self.context.new_child(**{self.loop_target: item})
+        widget = self.widget_factory(master=self.master, tree=self.tree, context=child_context)
+        return widget, child_context
+
+    def get_key(self, item):
+        scope = collections.ChainMap({self.loop_target: item}, self.context)
+        try:
+            return eval(self.loop_key.code, None, scope)
+        except Exception as e:
+            raise Exception("exception occured while evaluating expression `%s`" % self.loop_key.source) from e
 
     def update_items(self, items):
+        if items is not None and items is self.items:
+            # Reactive collection are kept in sync by mutation events.
+            return
+        if self.items is not None:
+            self.items.unsubscribe(self.on_mutation)
+        self.items = items if isinstance(items, _Observable) else None
+        if self.items is not None:
+            self.items.subscribe(self.on_mutation)
+        if self.loop_key is not None:
+            self.update_keyed_items(items)
+        else:
+            self.update_plain_items(items)
+
+    def on_mutation(self, collection, event):
+        if collection is not self.items:
+            return
+        if isinstance(event, ListSplice) and not (self.loop_key is not None and event.removed and event.added):
+            self.splice(event.index, len(event.removed), event.added)
+        elif self.loop_key is not None:
+            # Let the keyed diff reuse widgets when items are replaced or reordered.
+            self.update_keyed_items(collection)
+        else:
+            self.update_plain_items(collection)
+
+    def splice(self, index, removed, added):
+        """
+        Replace `removed` widgets at `index` by new widgets for `added` items.
+        """
+        keyed = self.loop_key is not None
+        # Widgets without key get updated in place with the new item.
+        common = 0 if keyed else min(removed, len(added))
+        for context, item in zip(self.contexts[index : index + common], added):
+            context[self.loop_target] = item
+        index += common
+        removed -= common
+        added = added[common:]
+        # Destroy widgets of removed items.
+        for widget in self.widgets[index : index + removed]:
+            widget.destroy()
+        del self.widgets[index : index + removed]
+        del self.contexts[index : index + removed]
+        del self.keys[index : index + removed]
+        # Create widgets for added items next to their siblings.
+        if keyed:
+            keys = [self.get_key(item) for item in added]
+            if len(set(self.keys).union(keys)) != len(self.keys) + len(keys):
+                raise ValueError("duplicate key in for loop: %s" % self.loop_key.source)
+            self.keys[index:index] = keys
+        prev = self.widgets[index - 1] if index > 0 else None
+        next_widget = self.widgets[index] if index < len(self.widgets) else None
+        for pos, item in enumerate(added, start=index):
+            widget, context = self.create_widget(item)
+            if prev is not None:
+                widget.pack(after=prev)
+            elif next_widget is not None:
+                widget.pack(before=next_widget)
+            prev = widget
+            self.widgets.insert(pos, widget)
+            self.contexts.insert(pos, context)
+
+    def update_plain_items(self, items):
+        # The list is evaluated once. Each widget receives its item
+        # and only get updated when the item changed.
+        items = list(items)
+        for context, item in zip(self.contexts, items):
+            context[self.loop_target] = item
         # We may need to create new widgets.
-        while self.idx < len(items):
-            widget = self.create_widget(self.idx)
+        for item in items[len(self.widgets) :]:
+            widget, context = self.create_widget(item)
             # Make sure to pack widget at the right location.
             # TODO Fix parent when all item get deleteds
             widget.pack(after=self.widgets[-1] if self.widgets else None)
             self.widgets.append(widget)
-            self.idx += 1
+            self.contexts.append(context)
         # We may need to delete widgets
-        while self.idx > len(items):
+        while len(self.widgets) > len(items):
             self.widgets.pop(-1).destroy()
-            self.idx -= 1
+            self.contexts.pop(-1)
+
+    def update_keyed_items(self, items):
+        items = list(items)
+        keys = [self.get_key(item) for item in items]
+        if len(set(keys)) != len(keys):
+            raise ValueError("duplicate key in for loop: %s" % self.loop_key.source)
+        # Destroy widgets of removed keys.
+        new_keys = set(keys)
+        old_index = {}
+        for key, widget, context in zip(self.keys, self.widgets, self.contexts):
+            if key in new_keys:
+                old_index[key] = len(old_index)
+            else:
+                widget.destroy()
+        # Reuse widgets of existing keys and create the others.
+        reused = {key: (widget, context) for key, widget, context in zip(self.keys, self.widgets, self.contexts)}
+        widgets = []
+        contexts = []
+        sources = []
+        for key, item in zip(keys, items):
+            if key in old_index:
+                widget, context = reused[key]
+                context[self.loop_target] = item
+                sources.append(old_index[key])
+            else:
+                widget, context = self.create_widget(item)
+                sources.append(-1)
+            widgets.append(widget)
+            contexts.append(context)
+        # Widgets part of the longest increasing subsequence keep their location.
+        # Other widgets are moved next to them.
+        stable = _longest_increasing_subsequence(sources)
+        first_stable = widgets[min(stable)] if stable else None
+        prev = None
+        for pos, widget in enumerate(widgets):
+            if pos in stable:
+                prev = widget
+            elif prev is not None:
+                widget.pack(after=prev)
+                prev = widget
+            elif first_stable is not None:
+                widget.pack(before=first_stable)
+                prev = widget
+            else:
+                prev = widget
+        self.keys = keys
+        self.widgets = widgets
+        self.contexts = contexts
+
+
+class VirtualLoop(Loop):
+    """
+    Pseudo widget used to handle for loops inside a virtual ScrolledFrame.
+
+    Only the rows visible in the viewport, plus a few `overscan` rows, get
+    created. Rows are recycled while scrolling. Every row has the same
+    height, either defined by `rowheight` or measured on the first row.
+    """
+
+    def __init__(self, tree, for_expr, scrolled_frame, context, widget_factory):
+        self.scrolled_frame = scrolled_frame
+        self.offset = 0  # Scroll offset in pixels.
+        self.rowheight = scrolled_frame.rowheight
+        self.all_items = []
+        self.rows = {}  # Widget and context of each visible row by index.
+        self.pool = []  # Recycled widget and context.
+        scrolled_frame.view = self
+        super().__init__(tree, for_expr, scrolled_frame.interior, context, widget_factory)
+
+    def update_plain_items(self, items):
+        self.all_items = list(items)
+        self.refresh()
+
+    # Rows get recycled, keys are not used.
+    update_keyed_items = update_plain_items
+
+    def on_mutation(self, collection, event):
+        if collection is not self.items:
+            return
+        self.update_plain_items(collection)
+
+    def _viewport_height(self):
+        return max(self.scrolled_frame.canvas.winfo_height(), 1)
+
+    def _measure(self):
+        # Measure height of the first row.
+        widget, context = self.create_widget(self.all_items[0])
+        widget.update_idletasks()
+        self.rowheight = max(widget.winfo_reqheight(), 1)
+        widget.pack_forget()
+        self.pool.append((widget, context))
+
+    def yview(self, *args):
+        """
+        Query or change the vertical position of the view. Same arguments as
+        `Canvas.yview()`.
+        """
+        total = len(self.all_items) * (self.rowheight or 1)
+        viewport = self._viewport_height()
+        if not args:
+            if total <= viewport:
+                return (0.0, 1.0)
+            return (self.offset / total, min(1.0, (self.offset + viewport) / total))
+        if args[0] == "moveto":
+            self.offset = float(args[1]) * total
+        elif args[0] == "scroll":
+            step = viewport if args[2].startswith("page") else (self.rowheight or 1)
+            self.offset += int(args[1]) * step
+        self.refresh()
+
+    def refresh(self):
+        """
+        Create, recycle and place the rows visible in the viewport.
+        """
+        if not self.rowheight and self.all_items:
+            self._measure()
+        rowheight = self.rowheight or 1
+        count = len(self.all_items)
+        viewport = self._viewport_height()
+        self.offset = max(0, min(self.offset, count * rowheight - viewport))
+        overscan = self.scrolled_frame.overscan
+        first = max(0, int(self.offset // rowheight) - overscan)
+        last = min(count, int((self.offset + viewport) // rowheight) + 1 + overscan)
+        # Recycle rows outside the viewport.
+        for index in [index for index in self.rows if not first <= index < last]:
+            widget, context = self.rows.pop(index)
+            widget.place_forget()
+            self.pool.append((widget, context))
+        # Place rows inside the viewport.
+        for index in range(first, last):
+            item = self.all_items[index]
+            row = self.rows.get(index)
+            if row is None:
+                if self.pool:
+                    row = self.pool.pop()
+                    row[1][self.loop_target] = item
+                else:
+                    row = self.create_widget(item)
+                self.rows[index] = row
+            else:
+                row[1][self.loop_target] = item
+            row[0].place(x=0, y=index * rowheight - self.offset, relwidth=1, height=rowheight)
+        # Destroy recycled rows when the viewport get smaller.
+        while len(self.pool) > overscan * 2:
+            self.pool.pop()[0].destroy()
+        self.scrolled_frame._update_scrollbar(*self.yview())
 
 
 @widget('scrolledframe')
 class ScrolledFrame(ttk.Frame):
     """
     Let provide our own Scrolled frame supporting styled background color.
+
+    When `virtual` is enabled, a `for` loop inside the frame only creates the
+    rows visible in the viewport. `rowheight` define the height of each row,
+    when undefined, the height of the first row is used. `overscan` define
+    the number of rows created before and after the viewport.
     """
 
     def __init__(self, master, *args, **kw):
+        self.virtual = False
+        self.rowheight = 0
+        self.overscan = 2
+        self.view = None  # VirtualLoop managing the interior.
         ttk.Frame.__init__(self, master, *args, **kw)
 
         # create a canvas object and a vertical scrollbar for scrolling it
@@ -602,7 +2033,7 @@ class ScrolledFrame(ttk.Frame):
             height=min_height,
         )
         self.canvas.pack(side=tkinter.LEFT, fill=tkinter.BOTH, expand=tkinter.TRUE)
-        self.vscrollbar.config(command=self.canvas.yview)
+        self.vscrollbar.config(command=self.yview)
 
         # reset the view
         self.canvas.xview_moveto(0)
@@ -610,6 +2041,7 @@ class ScrolledFrame(ttk.Frame):
 
         # create a frame inside the canvas which will be scrolled with it
         self.interior = ttk.Frame(self.canvas)
+        self.interior.scrolled_frame = self
         self.interior_id = self.canvas.create_window(0, 0, window=self.interior, anchor=tkinter.NW)
 
         self.interior.bind("<Configure>", self._update_scroll_region)
@@ -621,6 +2053,9 @@ class ScrolledFrame(ttk.Frame):
     # track changes to the canvas and frame width and sync them,
     # also updating the scrollbar
     def _update_scroll_region(self, event):
+        # Scrolling is managed by the virtual loop.
+        if self.view is not None:
+            return
         # Update the scroll region when the interior widget is resized.
         # Since we only scroll on y axis, take the width from canvas and height from interior.
         self.canvas.config(scrollregion=(0, 0, self.interior.winfo_width(), self.interior.winfo_reqheight()))
@@ -631,6 +2066,13 @@ class ScrolledFrame(ttk.Frame):
             self.vscrollbar.pack(fill=tkinter.Y, side=tkinter.RIGHT, expand=tkinter.FALSE)
 
     def _configure_canvas(self, event):
+        # With virtual loop, the interior only cover the viewport.
+        if self.view is not None:
+            self.canvas.itemconfigure(
+                self.interior_id, width=self.canvas.winfo_width(), height=self.canvas.winfo_height()
+            )
+            self.view.refresh()
+            return
         # The current width of the canvas
         canvas_width = self.canvas.winfo_width()
         # The interior widget's requested width
@@ -644,16 +2086,32 @@ class ScrolledFrame(ttk.Frame):
             else:
                 self.vscrollbar.pack(fill=tkinter.Y, side=tkinter.RIGHT, expand=tkinter.FALSE)
 
+    def _update_scrollbar(self, first, last):
+        # Show/hide scroll bar as needed
+        self.vscrollbar.set(first, last)
+        if first <= 0 and last >= 1:
+            self.vscrollbar.forget()
+        else:
+            self.vscrollbar.pack(fill=tkinter.Y, side=tkinter.RIGHT, expand=tkinter.FALSE)
+
+    def yview(self, *args):
+        if self.view is not None:
+            return self.view.yview(*args)
+        return self.canvas.yview(*args)
+
+    def yview_scroll(self, number, what):
+        self.yview("scroll", number, what)
+
     def _on_mousewheel(self, event):
         # Skip scroll if canvas is bigger then content.
-        if self.canvas.yview() == (0.0, 1.0):
+        if tuple(self.yview()) == (0.0, 1.0):
             return
         # Pick scroll directio dependinds of event <Button-?> or delta value <MouseWheel>
         if event.num == 5 or event.delta < 0:
             scroll = 1
         elif event.num == 4 or event.delta > 0:
             scroll = -1
-        self.canvas.yview_scroll(scroll, "units")
+        self.yview_scroll(scroll, "units")
 
     def _bind_to_mousewheel(self, event):
         self.canvas.bind_all("<Button-4>", self._on_mousewheel)
@@ -675,10 +2133,25 @@ class ScrolledFrame(ttk.Frame):
         """
         Ovewrite configure to update style of canvas and interior.
         """
+        options = {k: kw.pop(k) for k in ["virtual", "rowheight", "overscan"] if k in kw}
+        if "virtual" in options:
+            value = options["virtual"]
+            self.virtual = value.lower() in ["true", "1"] if isinstance(value, str) else bool(value)
+        if "rowheight" in options:
+            self.rowheight = int(options["rowheight"] or 0)
+        if "overscan" in options:
+            self.overscan = int(options["overscan"])
+        if options and cnf is None and not kw:
+            return
         super().configure(cnf, **kw)
         if 'style' in kw:
             self._update_bg(None)
 
+    def cget(self, key):
+        if key in ["virtual", "rowheight", "overscan"]:
+            return getattr(self, key)
+        return super().cget(key)
+
 
 class TemplateError(Exception):
     """
@@ -688,12 +2161,48 @@ class TemplateError(Exception):
     pass
 
 
+def _template_error(e, tag, attrs):
+    """
+    Return the error raised when failing to create the widget of a tag.
+    """
+    return TemplateError(str(e) + " for tag <%s %s>" % (tag, " ".join(['%s="%s"' % (k, v) for k, v in attrs.items()])))
+
+
+class Attributes(object):
+    """
+    Element attributes preprocessed once per template.
+    """
+
+    __slots__ = ["id", "command", "visible", "geo", "geo_attrs", "options"]
+
+    def __init__(self, attrs):
+        self.id = attrs.get("id", None)
+        self.command = attrs.get("command", None)
+        self.visible = _binding(attrs["visible"]) if "visible" in attrs else None
+        # Geometry manager defined with `pack-` or `place-` prefix.
+        self.geo = sorted(
+            set([k.split('-')[0] for k in attrs.keys() if k.startswith("pack-") or k.startswith("place-")])
+        )
+        prefix = (self.geo[0] if self.geo else 'pack') + "-"
+        self.geo_attrs = {k.split('-')[1]: v for k, v in attrs.items() if k.startswith(prefix)}
+        # Other attributes with bindings compiled. Image is applied last to
+        # honour the image loading options.
+        self.options = [
+            (k, _binding(v))
+            for k, v in attrs.items()
+            if k not in ["id", "command", "visible"] and not k.startswith("pack-") and not k.startswith("place-")
+        ]
+        self.options.sort(key=lambda item: item[0] == "image")
+
+
 class Element(object):
     """
     HTML element
+
+    Elements are shared by every instance of a component and must not be updated.
     """
 
-    __slots__ = ["tag", "attrs", "children", "parent"]
+    __slots__ = ["tag", "attrs", "children", "parent", "_attributes", "_loop_body"]
 
     def __init__(self, tag="", attrs={}, parent=None):
         assert tag
@@ -702,6 +2211,8 @@ class Element(object):
         self.attrs = attrs
         self.children = []
         self.parent = parent
+        self._attributes = None
+        self._loop_body = None
         if parent:
             self.parent.children.append(self)
 
@@ -710,6 +2221,25 @@ class Element(object):
         node.children = self.children.copy()
         return node
 
+    def attributes(self):
+        """
+        Return the preprocessed attributes.
+        """
+        if self._attributes is None:
+            self._attributes = Attributes(self.attrs)
+        return self._attributes
+
+    def loop_body(self):
+        """
+        Return a copy of this element without the `for` and `key` attributes.
+        """
+        if self._loop_body is None:
+            node = self.copy()
+            node.attrs.pop("for", None)
+            node.attrs.pop("key", None)
+            self._loop_body = node
+        return self._loop_body
+
 
 class Parser(HTMLParser):
     """
@@ -733,6 +2263,389 @@ class Parser(HTMLParser):
         self.node = self.node.parent
 
 
+@functools.lru_cache(maxsize=256)
+def _parse(template):
+    """
+    Parse the template into a tree of `Element`. Parsed templates are kept in
+    cache and shared by every instance of a component.
+    """
+    parser = Parser()
+    parser.feed(template)
+    return parser.tree
+
+
+@functools.lru_cache(maxsize=256)
+def _template_hash(template):
+    """
+    Return the hash identifying a template.
+    """
+    return hashlib.sha1(template.encode("utf8")).hexdigest()
+
+
+def _qualname(obj):
+    return "%s.%s" % (getattr(obj, "__module__", None), getattr(obj, "__qualname__", None))
+
+
+def _builder_key(template):
+    """
+    Return the key identifying the compiled builder of a template. Compiled
+    builders call the attribute handlers directly, so the key also identifies
+    the widgets and handlers resolved for the template.
+    """
+    h = hashlib.sha1(_template_hash(template).encode("ascii"))
+    stack = [_parse(template)]
+    while stack:
+        tree = stack.pop()
+        if "for" in tree.attrs:
+            continue
+        widget_cls = _widgets.get(tree.tag, None)
+        if not isinstance(widget_cls, type):
+            widget_cls = None
+        h.update(("\n%s=%s" % (tree.tag, _qualname(widget_cls))).encode("utf8"))
+        if widget_cls is not None:
+            for k, unused in tree.attributes().options:
+                handler = _attr_handler(widget_cls, k)
+                if handler is not None:
+                    h.update(("\n%s:%s" % (k, _qualname(handler))).encode("utf8"))
+        stack.extend(reversed(tree.children))
+    return h.hexdigest()
+
+
+def _element(tag, attrs, children=()):
+    """
+    Create a tree of `Element`. Used by compiled templates.
+    """
+    node = Element(tag, attrs)
+    for child in children:
+        child.parent = node
+        node.children.append(child)
+    return node
+
+
+class _Generator(object):
+    """
+    Generate the Python source code of builders for templates.
+    """
+
+    def __init__(self):
+        self.constants = {}
+        self.imports = set()
+        self.lines = []
+
+    def constant(self, value):
+        """
+        Return the name of a module constant for the given value.
+        Bindings are compiled once when the module get imported.
+        """
+        if isinstance(value, Expression):
+            source = "tkvue._compile(%r)" % value.source
+        elif isinstance(value, Element):
+            source = self.element(value)
+        elif isinstance(value, tuple):
+            source = repr(value)
+        else:
+            return repr(value)
+        if source not in self.constants:
+            self.constants[source] = "_c%s" % len(self.constants)
+        return self.constants[source]
+
+    def element(self, tree):
+        children = ", ".join(self.element(child) for child in tree.children)
+        return "tkvue._element(%r, %r, [%s])" % (tree.tag, tree.attrs, children)
+
+    def reference(self, func):
+        """
+        Return the qualified name of the given function or None if it cannot be
+        imported by the generated code.
+        """
+        module = getattr(func, "__module__", None)
+        qualname = getattr(func, "__qualname__", "")
+        if not module or "<" in qualname:
+            return None
+        obj = sys.modules.get(module, None)
+        for name in qualname.split("."):
+            obj = getattr(obj, name, None)
+        if obj is not func:
+            return None
+        if module != "tkvue":
+            self.imports.add(module)
+        return "%s.%s" % (module, qualname)
+
+    def builder(self, name, template):
+        """
+        Generate the builder function for the given template.
+        """
+        self.lines.append("def %s(vue, master, context):" % name)
+        self.lines.append("    node = None")
+        self.lines.append("    try:")
+        root = self.walk(_parse(template), "master", [0])
+        self.lines.append("    except Exception as e:")
+        self.lines.append("        if node is None or isinstance(e, tkvue.TemplateError):")
+        self.lines.append("            raise")
+        self.lines.append("        raise tkvue._template_error(e, *node)")
+        self.lines.append("    return %s" % root)
+        self.lines.append("")
+        self.lines.append("")
+        self.lines.append("tkvue.register_builder(%r, %s)" % (_builder_key(template), name))
+
+    def emit(self, line):
+        self.lines.append("        " + line)
+
+    def walk(self, tree, master, counter):
+        if "for" in tree.attrs:
+            # Loop are created dynamically by the interpreter.
+            self.emit("node = None")
+            self.emit("vue._walk(%s, %s, context)" % (master, self.constant(tree)))
+            return None
+        attrs = tree.attributes()
+        # Attributes of components and widget factories are resolved when building.
+        widget_cls = _widgets.get(tree.tag, None)
+        if not isinstance(widget_cls, type):
+            widget_cls = None
+        if len(attrs.geo) > 1 and (widget_cls is None or hasattr(widget_cls, "pack")):
+            raise _template_error(
+                ValueError('widget can only use a single geometry manager: %s' % attrs.geo), tree.tag, tree.attrs
+            )
+        widget = "w%s" % counter[0]
+        counter[0] += 1
+        self.emit("node = %s" % self.constant((tree.tag, tree.attrs)))
+        self.emit(
+            "%s = vue._create_widget(%s, %r, %r, %r, context)" % (widget, master, tree.tag, attrs.command, attrs.id)
+        )
+        geo = attrs.geo[0] if attrs.geo else 'pack'
+        if widget_cls is None or attrs.visible is not None:
+            visible = self.constant(attrs.visible)
+            self.emit("vue._bind_geometry(%s, %r, %r, %s, context)" % (widget, geo, attrs.geo_attrs, visible))
+        elif hasattr(widget_cls, "pack"):
+            self.emit("%s.%s(%r)" % (widget, geo, attrs.geo_attrs))
+        for k, v in attrs.options:
+            self.option(widget, widget_cls, k, v)
+        if tree.children:
+            interior = "m%s" % widget[1:]
+            self.emit("%s = getattr(%s, 'interior', %s)" % (interior, widget, widget))
+            for child in tree.children:
+                self.walk(child, interior, counter)
+        return widget
+
+    def option(self, widget, widget_cls, key, value):
+        """
+        Generate the code to apply a single attribute. The attribute handler is
+        resolved when generating the code.
+        """
+        handler = _attr_handler(widget_cls, key) if widget_cls is not None else None
+        reference = self.reference(handler) if handler is not None else None
+        if widget_cls is None or key in ["textvariable", "variable", "selected"] or (handler and not reference):
+            self.emit("vue._bind_option(%s, %r, %s, context)" % (widget, key, self.constant(value)))
+            return
+        expr = _binding(value)
+        if not isinstance(expr, Expression):
+            if reference:
+                self.emit("%s(%s, %r)" % (reference, widget, value))
+            else:
+                self.emit("%s.configure(**{%r: %r})" % (widget, key, value))
+            return
+        if reference:
+            self.emit("f = functools.partial(%s, %s)" % (reference, widget))
+        else:
+            self.emit("f = functools.partial(tkvue._configure, %s, %r)" % (widget, key))
+        expr = self.constant(expr)
+        self.emit("f(context.watch(%s, f))" % expr)
+        self.emit("%s.bind('<Destroy>', lambda event, f=f: context.unwatch(%s, f), add='+')" % (widget, expr))
+
+    def source(self, header=""):
+        lines = [header, "import functools", ""]
+        lines.extend("import %s" % name for name in sorted(self.imports | {"tkvue"}))
+        lines.append("")
+        lines.extend("%s = %s" % (name, source) for source, name in self.constants.items())
+        lines.extend(["", ""])
+        lines.extend(self.lines)
+        return "\n".join(lines).lstrip() + "\n"
+
+
+def compile_template(template, name="build"):
+    """
+    Return the Python source code of a module defining a builder function
+    for the given template. Once imported, the builder is used in place of the
+    template interpreter by every component using this template.
+    """
+    if isinstance(template, bytes):
+        template = template.decode("utf8")
+    generator = _Generator()
+    generator.builder(name, template)
+    return generator.source()
+
+
+def compile_module(module):
+    """
+    Return the Python source code of the compiled templates of every
+    component defined in the given module. The generated code must be saved as
+    `<module>_tkvue.py` next to the module to be loaded automatically.
+    """
+    generator = _Generator()
+    templates = set()
+    for name, cls in sorted(vars(module).items()):
+        if not (isinstance(cls, type) and issubclass(cls, Component) and cls.__module__ == module.__name__):
+            continue
+        template = cls.template
+        if isinstance(template, bytes):
+            template = template.decode("utf8")
+        if template in templates:
+            continue
+        templates.add(template)
+        if generator.lines:
+            generator.lines.extend(["", ""])
+        generator.builder("build_%s" % name, template)
+    return generator.source(header="# Generated by `python -m tkvue compile` from %s. Do not edit." % module.__name__)
+
+
+def register_builder(key, builder):
+    """
+    Register a compiled builder for the template matching the given key.
+    """
+    _builders[key] = builder
+
+
+def _compiled_module_name(module_name):
+    """
+    Return the name of the module containing compiled templates.
+    """
+    if module_name == "__main__":
+        main = sys.modules.get("__main__", None)
+        spec = getattr(main, "__spec__", None)
+        if spec is not None:
+            module_name = spec.name
+        elif getattr(main, "__file__", None):
+            module_name = os.path.splitext(os.path.basename(main.__file__))[0]
+        else:
+            return None
+    return module_name + "_tkvue"
+
+
+def _find_builder(component_cls, template):
+    """
+    Return the compiled builder for the given template. Look for compiled
+    module next to the component module. Return None if the template is not
+    compiled, if the compiled module is out of date or cannot be imported.
+    """
+    key = _builder_key(template)
+    if key not in _builders:
+        name = _compiled_module_name(component_cls.__module__)
+        if name is not None and name not in _compiled_modules:
+            _compiled_modules.add(name)
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                # Fallback to the template interpreter if the compiled module is broken.
+                if not isinstance(e, ModuleNotFoundError) or e.name != name:
+                    logger.warning("fail to load compiled templates %s", name, exc_info=1)
+    return _builders.get(key, None)
+
+
+def command(policy="drop", disable=False):
+    """
+    Function decorator to define how a coroutine command is run when the
+    widget get invoked while the previous task is still running:
+
+    * "drop": ignore the new invocation
+    * "queue": run once the previous task completes
+    * "restart": cancel the previous task and run again
+
+    When `disable` is enabled, the widget is disabled while the task runs.
+    """
+    assert policy in ["drop", "queue", "restart"], "unsupported policy: %s" % policy
+
+    def decorate(f):
+        f._tkvue_command = (policy, disable)
+        return f
+
+    return decorate
+
+
+class _AsyncCommand(object):
+    """
+    Command of a widget running coroutines on the event loop of the mainloop.
+    """
+
+    __slots__ = ["func", "policy", "disable", "widget", "task", "pending", "restore"]
+
+    def __init__(self, func, policy="drop", disable=False):
+        self.func = func
+        self.policy = policy
+        self.disable = disable
+        self.widget = None
+        self.task = None
+        self.pending = collections.deque()
+        self.restore = None  # State of the widget before being disabled
+
+    def __call__(self):
+        coro = self.func()
+        if not asyncio.iscoroutine(coro):
+            return coro
+        if self.task is not None and not self.task.done():
+            if self.policy == "drop":
+                coro.close()
+                return
+            elif self.policy == "queue":
+                self.pending.append(coro)
+                return
+            self.task.cancel()
+        self._start(coro)
+
+    def _start(self, coro):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Invoked outside of the event loop, e.g. by `invoke()`.
+            loop = _mainloop_loop
+        if loop is None or loop.is_closed():
+            coro.close()
+            raise RuntimeError("coroutine command must be invoked within the component mainloop")
+        self.task = loop.create_task(coro)
+        self.task.add_done_callback(self._done)
+        self._disable()
+
+    def _done(self, task):
+        # Ignore tasks cancelled by a restart.
+        if task is not self.task:
+            return
+        self.task = None
+        if not task.cancelled() and task.exception() is not None:
+            self._report(task.exception())
+        if self.pending:
+            self._start(self.pending.popleft())
+        else:
+            self._restore()
+
+    def _report(self, e):
+        if self.widget is not None:
+            self.widget._root().report_callback_exception(type(e), e, e.__traceback__)
+        else:
+            logger.error("exception occured in command", exc_info=e)
+
+    def _disable(self):
+        if not self.disable or self.widget is None or self.restore is not None:
+            return
+        if isinstance(self.widget, ttk.Widget):
+            # Keep the flags changed to restore them later.
+            self.restore = self.widget.state(["disabled"])
+        else:
+            self.restore = self.widget.cget("state")
+            self.widget.configure(state="disabled")
+
+    def _restore(self):
+        restore, self.restore = self.restore, None
+        if not restore:
+            return
+        try:
+            if isinstance(self.widget, ttk.Widget):
+                self.widget.state(restore)
+            else:
+                self.widget.configure(state=restore)
+        except tkinter.TclError:
+            # Widget was destroyed while the task was running.
+            pass
+
+
 class TkVue:
     def __init__(self, component, master):
         assert component
@@ -740,22 +2653,28 @@ class TkVue:
 
         # Keep reference to the component.
         self.component = component
+        self._functions = {}
         if not hasattr(self.component, "data"):
             self.component.data = Context()
+        # Declare the state of the background jobs.
+        for name in _component_jobs(component.__class__):
+            self.component.data.setdefault(name, JobState())
 
         # Read the template
-        parser = Parser()
-        if isinstance(component.template, bytes):
-            parser.feed(component.template.decode("utf8"))
-        else:
-            parser.feed(component.template)
+        template = component.template
+        if isinstance(template, bytes):
+            template = template.decode("utf8")
 
         # Generate the widget from template.
-        self.component.root = self._walk(master=master, tree=parser.tree, context=self.component.data)
+        builder = _find_builder(component.__class__, template)
+        if builder is not None:
+            self.component.root = builder(self, master, self.component.data)
+        else:
+            self.component.root = self._walk(master=master, tree=_parse(template), context=self.component.data)
 
     def _bind_attr(self, widget, value, func, context):
-        if value.startswith("{{") and value.endswith("}}"):
-            expr = value[2:-2]
+        expr = _binding(value)
+        if isinstance(expr, Expression):
             # Register observer
             expr_value = context.watch(expr, func)
             # Assign the value
@@ -771,8 +2690,9 @@ class TkVue:
             func(value)
 
     def _dual_bind_attr(self, widget, value, attr, context):
-        assert value.startswith("{{") and value.endswith("}}")
-        expr = value[2:-2].strip()
+        expr = _binding(value)
+        assert isinstance(expr, Expression), "%s attribute must be a binding: %s" % (attr, value)
+        key = expr.source.strip()
         # Get current variable type.
         # And create appropriate variable type.
         var_type = type(context.eval(expr))
@@ -785,19 +2705,30 @@ class TkVue:
         else:
             var = tkinter.StringVar(master=widget)
         # Support dual-databinding
-        self._bind_attr(widget, value, lambda new_value, var=var: var.set(new_value), context)
-        var.trace_add("write", lambda *args, var=var: context.set(expr, var.get()))
+        self._bind_attr(widget, expr, lambda new_value, var=var: var.set(new_value), context)
+        var.trace_add("write", lambda *args, var=var: context.set(key, var.get()))
         # TODO trace_remove
         widget.configure({attr: var})
 
-    def _bind_attrs(self, master, tag, attrs, context):
+    def _bind_attrs(self, master, tree, context):
         """
         Resolve attributes values for the given widget.
         Then apply them using configure() and pack()
         """
-        assert tag
-        assert attrs is not None
+        assert tree
+        attrs = tree.attributes()
+        widget = self._create_widget(master, tree.tag, attrs.command, attrs.id, context)
+        if len(attrs.geo) > 1 and hasattr(widget, 'pack'):
+            raise ValueError('widget can only use a single geometry manager: %s' % attrs.geo)
+        self._bind_geometry(widget, attrs.geo[0] if attrs.geo else 'pack', attrs.geo_attrs, attrs.visible, context)
+        for k, v in attrs.options:
+            self._bind_option(widget, k, v, context)
+        return widget
 
+    def _create_widget(self, master, tag, command, id, context):
+        """
+        Create the widget matching the given tag.
+        """
         # Get widget class.
         widget_cls = _widgets.get(tag, None)
         if widget_cls is None:
@@ -806,61 +2737,63 @@ class TkVue:
 
         # The "command" attribute must be pass during widget construction.
         kwargs = {}
-        if "command" in attrs:
-            kwargs["command"] = self._create_command(attrs["command"], context)
+        if command is not None:
+            kwargs["command"] = self._create_command(command, context)
 
         #
         # Create widget.
         #
         widget = widget_cls(master=master, **kwargs)
+        if isinstance(kwargs.get("command"), _AsyncCommand):
+            kwargs["command"].widget = widget
 
         #
         # Assign widget to variables.
         #
-        if "id" in attrs:
-            setattr(self.component, attrs["id"], widget)
+        if id is not None:
+            setattr(self.component, id, widget)
+        return widget
 
-        # Check if args contains pack or :pack
+    def _bind_geometry(self, widget, geo, geo_attrs, visible, context):
+        """
+        Apply the geometry manager to the widget. When `visible` is defined,
+        the widget get forgotten or managed according to its value.
+        """
         # If the widget doesn't need to be pack. We don't need to compute changes.
-        if hasattr(widget, 'pack'):
-            geo = list(set([k.split('-')[0] for k in attrs.keys() if k.startswith("pack-") or k.startswith("place-")]))
-            if len(geo) > 1:
-                raise ValueError('widget can only use a single geometry manager: %s' % geo)
-            geo = geo[0] if geo else 'pack'
-            geo_attrs = {k.split('-')[1]: v for k, v in attrs.items() if k.startswith(geo + "-")}
-            if "visible" in attrs:
-                self._bind_attr(
-                    widget,
-                    attrs["visible"],
-                    lambda value, geo_attrs=geo_attrs, geo=geo: getattr(widget, geo)(geo_attrs)
-                    if value
-                    else widget.forget(),
-                    context,
-                )
-            else:
-                getattr(widget, geo)(geo_attrs)
-        for k, v in attrs.items():
-            if k in ["id", "command", "visible"] or k.startswith("pack-") or k.startswith("place-"):
-                # ignore pack attribute
-                continue
-            elif k in ["textvariable", "variable"]:
-                self._dual_bind_attr(widget, v, k, context)
-            elif k == "selected":
-                # Special attribute for Button, Checkbutton
-                self._bind_attr(
-                    widget, v, lambda value: widget.state(["selected" if value else "!selected", "!alternate"]), context
-                )
-            else:
-                # Lookup attribute registry
-                func = [func for a, func in _attrs.items() if a[1] == k if isinstance(widget, a[0])]
-                if func:
-                    func = functools.partial(func[0], widget)
-                else:
-                    # Otherwise default to widget configure
-                    func = functools.partial(_configure, widget, k)
-                self._bind_attr(widget, v, func, context)
+        if not hasattr(widget, 'pack'):
+            return
+        if visible is not None:
+            self._bind_attr(
+                widget,
+                visible,
+                lambda value, geo_attrs=geo_attrs, geo=geo: getattr(widget, geo)(geo_attrs)
+                if value
+                else widget.forget(),
+                context,
+            )
+        else:
+            getattr(widget, geo)(geo_attrs)
 
-        return widget
+    def _bind_option(self, widget, key, value, context):
+        """
+        Bind a single attribute to the widget.
+        """
+        if key in ["textvariable", "variable"]:
+            self._dual_bind_attr(widget, value, key, context)
+        elif key == "selected":
+            # Special attribute for Button, Checkbutton
+            self._bind_attr(
+                widget, value, lambda value: widget.state(["selected" if value else "!selected", "!alternate"]), context
+            )
+        else:
+            # Lookup attribute registry
+            func = _attr_handler(type(widget), key)
+            if func:
+                func = functools.partial(func, widget)
+            else:
+                # Otherwise default to widget configure
+                func = functools.partial(_configure, widget, key)
+            self._bind_attr(widget, value, func, context)
 
     def _create_command(self, value, context):
         """
@@ -869,21 +2802,48 @@ class TkVue:
         """
         if value.startswith("{{"):
             raise ValueError("cannot use binding ({{) in `command` attribute: " + value)
-        available_functions = {
-            k: getattr(self.component, k) for k in dir(self.component) if callable(getattr(self.component, k))
-        }
         # May need to adjust this to detect expression.
         if "(" in value or "=" in value:
+            expr = _compile(value)
+            # Component functions take precedence over context variables.
+            functions = {name: self._function(name) for name in expr.names if self._function(name)}
+            scope = collections.ChainMap(functions, context) if functions else context
 
             def func():
-                return context.eval(value, **available_functions)
+                try:
+                    return eval(expr.code, None, scope)
+                except Exception as e:
+                    raise Exception("exception occured while evaluating expression `%s`" % expr.source) from e
 
+            coroutines = [f for f in functions.values() if asyncio.iscoroutinefunction(f)]
         else:
-            func = available_functions.get(value, None)
-            if func is None or not hasattr(func, "__call__"):
+            func = self._function(value)
+            if func is None:
                 raise ValueError(
                     '`command` attribute must define a function to be called `function_name(arg1, arg2)`: ' + value
                 )
+            coroutines = [func] if asyncio.iscoroutinefunction(func) else []
+        # Coroutines get scheduled on the event loop.
+        if coroutines:
+            policy, disable = getattr(coroutines[0], "_tkvue_command", ("drop", False))
+            return _AsyncCommand(func, policy=policy, disable=disable)
+        return func
+
+    def _function(self, name):
+        """
+        Return the component function matching the given name or None.
+        Functions are resolved once per component.
+        """
+        try:
+            return self._functions[name]
+        except KeyError:
+            pass
+        func = None
+        if name in vars(self.component) or hasattr(type(self.component), name):
+            func = getattr(self.component, name)
+            if not callable(func):
+                func = None
+        self._functions[name] = func
         return func
 
     # TODO Make this function static.
@@ -894,27 +2854,29 @@ class TkVue:
         attrs = tree.attrs
         # Handle for loop
         if "for" in attrs:
-            widget = Loop(
-                tree,
-                attrs["for"],
-                master=master,
-                context=context,
-                widget_factory=self._walk,
-            )
-            tree.children = []
+            scrolled_frame = getattr(master, "scrolled_frame", None)
+            if scrolled_frame is not None and scrolled_frame.virtual:
+                widget = VirtualLoop(
+                    tree,
+                    attrs["for"],
+                    scrolled_frame=scrolled_frame,
+                    context=context,
+                    widget_factory=self._walk,
+                )
+            else:
+                widget = Loop(
+                    tree,
+                    attrs["for"],
+                    master=master,
+                    context=context,
+                    widget_factory=self._walk,
+                )
             return None
         try:
             # Create the widget with required attributes.
-            widget = self._bind_attrs(master, tree.tag, attrs, context)
+            widget = self._bind_attrs(master, tree, context)
         except Exception as e:
-            raise TemplateError(
-                str(e)
-                + " for tag <%s %s>"
-                % (
-                    tree.tag,
-                    " ".join(['%s="%s"' % (k, v) for k, v in tree.attrs.items()]),
-                )
-            )
+            raise _template_error(e, tree.tag, tree.attrs)
         # Support ScrolledFrame with `interior`
         interior = getattr(widget, "interior", widget)
         # Create child widgets.
@@ -923,9 +2885,283 @@ class TkVue:
         return widget
 
 
+# Immutable snapshot of a background job stored in the component context.
+JobState = collections.namedtuple("JobState", ["running", "progress", "result", "error"])
+JobState.__new__.__defaults__ = (False, None, None, None)
+
+_job_executors = {}
+_job_lock = threading.RLock()
+
+
+def _get_job_executor(name):
+    """
+    Return the managed executor used to run background jobs.
+    """
+    with _job_lock:
+        if name not in _job_executors:
+            if name == "thread":
+                _job_executors[name] = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="tkvue-job")
+            elif name == "process":
+                _job_executors[name] = concurrent.futures.ProcessPoolExecutor()
+            else:
+                raise ValueError("unsupported executor: %s" % name)
+        return _job_executors[name]
+
+
+def _call_job(module, qualname, args, kwargs):
+    """
+    Entry point of a job running in another process. The job is looked up by
+    name since the component cannot be sent to the process.
+    """
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj.func(*args, **kwargs)
+
+
+class _JobRun(object):
+    """
+    A single execution of a background job.
+    """
+
+    __slots__ = ["future", "cancelled"]
+
+    def __init__(self):
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def progress(self, value, update):
+        # Raise within the job to interrupt it as soon as possible.
+        if self.cancelled:
+            raise concurrent.futures.CancelledError()
+        update(self, progress=value)
+
+
+class Job(object):
+    """
+    Component method running in the background. See `job()`.
+    """
+
+    def __init__(self, func, executor="thread", policy="latest", progress=False):
+        assert policy in ["latest", "parallel"], "unsupported policy: %s" % policy
+        assert not (progress and executor == "process"), "progress is not supported by process jobs"
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = func.__name__
+        self.executor = executor
+        self.policy = policy
+        self.progress = progress
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return _BoundJob(self, instance)
+
+
+class _BoundJob(object):
+    """
+    Background job of a component instance.
+    """
+
+    __slots__ = ["job", "instance"]
+
+    def __init__(self, job, instance):
+        self.job = job
+        self.instance = instance
+
+    def _runs(self):
+        return self.instance.__dict__.setdefault("_job_runs", {}).setdefault(self.job.name, [])
+
+    @property
+    def state(self):
+        return self.instance.__dict__.get("_job_states", {}).get(self.job.name, JobState())
+
+    def _update(self, run, **changes):
+        with _job_lock:
+            runs = self._runs()
+            # Ignore updates of superseded or cancelled runs.
+            if run is not None and (run.cancelled or run not in runs):
+                return
+            state = self.state._replace(**changes)
+            self.instance.__dict__.setdefault("_job_states", {})[self.job.name] = state
+            self.instance.data.set_threadsafe(self.job.name, state)
+
+    def _done(self, run, future):
+        with _job_lock:
+            runs = self._runs()
+            if run not in runs:
+                return
+            runs.remove(run)
+            if future.cancelled():
+                self._update(None, running=bool(runs))
+            elif future.exception() is not None:
+                self._update(None, running=bool(runs), error=future.exception())
+            else:
+                self._update(None, running=bool(runs), result=future.result())
+
+    def __call__(self, *args, **kwargs):
+        """
+        Start the job in the background and return its future.
+        """
+        job = self.job
+        executor = _get_job_executor(job.executor) if isinstance(job.executor, str) else job.executor
+        run = _JobRun()
+        with _job_lock:
+            runs = self._runs()
+            if job.policy == "latest":
+                self._cancel(runs)
+            runs.append(run)
+            self._update(run, running=True, progress=None, error=None)
+        if job.progress:
+            kwargs["progress"] = functools.partial(run.progress, update=self._update)
+        try:
+            if job.executor == "process":
+                run.future = executor.submit(_call_job, job.func.__module__, job.func.__qualname__, args, kwargs)
+            else:
+                run.future = executor.submit(job.func, self.instance, *args, **kwargs)
+        except BaseException:
+            with _job_lock:
+                runs.remove(run)
+                self._update(None, running=bool(runs))
+            raise
+        run.future.add_done_callback(functools.partial(self._done, run))
+        return run.future
+
+    def cancel(self):
+        """
+        Cancel the running jobs. A job already running is interrupted the next
+        time it reports its progress.
+        """
+        with _job_lock:
+            self._cancel(self._runs())
+            self._update(None, running=False, progress=None)
+
+    def _cancel(self, runs):
+        # Forget about the runs first so their results get ignored.
+        cancelled = list(runs)
+        runs.clear()
+        for run in cancelled:
+            run.cancel()
+
+
+@functools.lru_cache(maxsize=None)
+def _component_jobs(cls):
+    """
+    Return the name of the background jobs declared by the component class.
+    """
+    return tuple(name for klass in cls.__mro__ for name, value in vars(klass).items() if isinstance(value, Job))
+
+
+def job(func=None, executor="thread", policy="latest", progress=False):
+    """
+    Declare a component method running in the background on a managed
+    executor. `executor` is either "thread", "process" or an Executor.
+
+    The state of the job is stored in the component context with the name of
+    the method as an immutable `JobState`, so templates may bind to it:
+
+        <Label text="Loading..." visible="{{ load.running }}" />
+
+    Calling the method start the job and return its future. With the "latest"
+    policy, starting the job cancel the previous run and ignore its result.
+    With the "parallel" policy, every run updates the state when completed.
+
+    When `progress` is enabled, the method receive a `progress` callable to
+    report its progress. Calling it raise CancelledError once the run is
+    cancelled. Jobs running in a process are called without the component
+    and must be declared without `self`.
+    """
+
+    def decorator(func):
+        return Job(func, executor=executor, policy=policy, progress=progress)
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def _x11_connection_number(root):
+    """
+    Return the file descriptor of the X11 connection used by Tk.
+    Return None if not available for this platform.
+    """
+    try:
+        if root.tk.call("tk", "windowingsystem") != "x11":
+            return None
+        import ctypes
+        import ctypes.util
+
+        version = ".".join(str(root.tk.call("info", "patchlevel")).split(".")[:2])
+        libtk = ctypes.CDLL(ctypes.util.find_library("tk" + version) or "libtk%s.so" % version)
+        libx11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+        libtk.Tk_MainWindow.argtypes = [ctypes.c_void_p]
+        libtk.Tk_MainWindow.restype = ctypes.c_void_p
+        libx11.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        libx11.XConnectionNumber.restype = ctypes.c_int
+        tkwin = libtk.Tk_MainWindow(root.tk.interpaddr())
+        if not tkwin:
+            return None
+        # Display is the first field of Tk_FakeWin. See Tk_Display() macro.
+        display = ctypes.c_void_p.from_address(tkwin).value
+        if not display:
+            return None
+        return libx11.XConnectionNumber(display)
+    except (ImportError, OSError, AttributeError, ValueError, tkinter.TclError):
+        logger.debug("cannot get X11 connection number", exc_info=1)
+        return None
+
+
+class UpdateStats(object):
+    """
+    Metrics of the Tk event processing slices.
+    """
+
+    __slots__ = ["budget", "slices", "events", "total_time", "last_time", "max_time", "backlog"]
+
+    def __init__(self, budget):
+        self.budget = budget  # Current time budget of a slice in seconds
+        self.slices = 0  # Number of slices
+        self.events = 0  # Number of events processed
+        self.total_time = 0  # Time spent processing events
+        self.last_time = 0  # Length of the last slice
+        self.max_time = 0  # Length of the longest slice
+        self.backlog = 0  # Number of slices interrupted with events still pending
+
+    def record(self, events, elapsed, backlog):
+        self.slices += 1
+        self.events += events
+        self.total_time += elapsed
+        self.last_time = elapsed
+        self.max_time = max(self.max_time, elapsed)
+        if backlog:
+            self.backlog += 1
+
+
 class Component:
     template = """<Label text="default template" />"""
 
+    # When enabled, the event loop wakes up only when Tk has events to process.
+    event_driven = True
+    # Bounds of the timeout used to process Tk timers in seconds.
+    min_timeout = 0.001
+    max_timeout = 0.1
+    # Bounds of the time spent processing Tk events before yielding to asyncio in seconds.
+    min_slice_budget = 0.002
+    max_slice_budget = 0.016
+    # Maximum number of Tk events processed before yielding to asyncio.
+    slice_events = 200
+    # Maximum timeout while Tk timers of unknown deadline are pending or while
+    # other tasks may update the widgets in seconds.
+    poll_timeout = 0.01
+
     def __init_subclass__(cls, **kwargs):
         if cls not in _components:
             _components[cls.__name__.lower()] = cls
@@ -933,6 +3169,8 @@ class Component:
 
     def __init__(self, master=None):
         self.root = None
+        self.update_stats = UpdateStats(budget=self.min_slice_budget * 2)
+        self._modal = None  # Future of the result when shown as modal dialog
         self.vue = TkVue(self, master=master)
         # Replace mainloop implementation for TopLevel
         if hasattr(self.root, 'mainloop'):
@@ -946,29 +3184,156 @@ class Component:
     def get_event_loop(self):
         return asyncio.get_event_loop()
 
+    async def show_modal(self):
+        """
+        Show this component as a modal dialog and wait until it get closed by
+        `close_modal()`. Return the result of the dialog.
+
+        Unlike `wait_window()`, the event loop keeps running while the dialog
+        is shown. The dialog is withdrawn when closed, so the same instance
+        may be shown again.
+        """
+        if self._modal is not None and not self._modal.done():
+            raise RuntimeError("dialog is already shown")
+        root = self.root
+        if self._modal is None:
+            root.bind("<Destroy>", lambda event: event.widget is root and self.close_modal(), add="+")
+        self._modal = future = asyncio.get_running_loop().create_future()
+        root.protocol("WM_DELETE_WINDOW", self.close_modal)
+        if root.master is not None:
+            root.transient(root.master)
+            root.tk.eval('tk::PlaceWindow %s widget %s' % (root, root.master))
+        else:
+            root.deiconify()
+        try:
+            # Can't grab until window appears.
+            while not future.done() and not root.winfo_viewable():
+                await asyncio.sleep(0.01)
+            if not future.done():
+                root.grab_set()
+            return await future
+        finally:
+            try:
+                root.grab_release()
+                root.withdraw()
+            except tkinter.TclError:
+                # Dialog was destroyed.
+                pass
+
+    def close_modal(self, result=None):
+        """
+        Close the modal dialog and return the given result to `show_modal()`.
+        """
+        if self._modal is not None and not self._modal.done():
+            self._modal.set_result(result)
+
     def _mainloop(self):
         asyncio.run(self._async_mainloop())
 
     async def _async_mainloop(self):
         '''
         An asynchronous implementation of tkinter mainloop
+
+        When possible, wait for the X11 connection to be readable or for the
+        context to be updated instead of polling Tk. Since Tk timers are not
+        visible, the timeout grows while Tk is idle.
         '''
-        while True:
-            try:
-                self.root.winfo_exists()  # Throw TclError if the main Windows is destroyed
-                await self._update_root()
-            except tkinter.TclError:
-                break
-            await asyncio.sleep(0.01)
+        global _mainloop_loop
+        loop = asyncio.get_running_loop()
+        fd = _x11_connection_number(self.root) if self.event_driven else None
+        wakeup = asyncio.Event()
+        if fd is not None:
+            loop.add_reader(fd, wakeup.set)
+            _wakeups.add(wakeup.set)
+        timeout = self.min_timeout
+        # Apply context updates from other threads and run coroutine commands within this loop.
+        _mainloop_loop = _thread_updates.loop = loop
+        if _thread_updates.pending:
+            loop.call_soon(_thread_updates.apply)
+        try:
+            while True:
+                try:
+                    self.root.winfo_exists()  # Throw TclError if the main Windows is destroyed
+                    processed = await self._update_root()
+                except tkinter.TclError:
+                    break
+                if fd is None:
+                    await asyncio.sleep(0.01)
+                    continue
+                timeout = self.min_timeout if processed else min(timeout * 2, self.max_timeout)
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self._next_timeout(timeout))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if _thread_updates.loop is loop:
+                _thread_updates.loop = None
+            if _mainloop_loop is loop:
+                _mainloop_loop = None
+            if fd is not None:
+                loop.remove_reader(fd)
+                _wakeups.discard(wakeup.set)
+
+    def _next_timeout(self, timeout):
+        """
+        Return how long to wait for the X11 connection. Tk timers and idle
+        callbacks don't make the connection readable, so the timeout is
+        limited to the deadline of the timers created by tkvue. Other timers
+        are polled like before and idle callbacks are processed as soon as
+        possible.
+        """
+        root = self.root
+        deadlines = {}
+        for owner in [getattr(root, "_animation_clock", None), getattr(root, "_image_cache", None)]:
+            if owner is not None and owner.timer is not None:
+                deadlines[owner.timer] = owner.deadline
+        for timer in root.tk.splitlist(root.tk.call("after", "info")):
+            if timer in deadlines:
+                continue
+            if root.tk.splitlist(root.tk.call("after", "info", timer))[-1] == "idle":
+                return self.min_timeout
+            # Deadline of other timers is unknown.
+            timeout = min(timeout, self.poll_timeout)
+        if deadlines:
+            timeout = min(timeout, min(deadlines.values()) / 1000 - time.monotonic())
+        # Widgets updated directly by other tasks get redrawn on idle.
+        if len(asyncio.all_tasks()) > 1:
+            timeout = min(timeout, self.poll_timeout)
+        return max(self.min_timeout, timeout)
 
     async def _update_root(self):
         """
         This coroutine runs a complete iteration of the tkinter event loop for a
-        root. It yields in between each individual event, which prevents it from
-        blocking the asyncio event loop. It runs until there are no more events in
+        root. Events are processed in slices limited in time and number of events,
+        yielding to asyncio in between, which prevents it from blocking the asyncio
+        event loop. The time budget of a slice grows while events are pending and
+        shrinks once the queue is drained. It runs until there are no more events in
         the queue, then returns, allowing the caller to do other tasks or sleep
         afterwards. This keeps CPU load low. Generally clients will never need to
         call this function; it should only be used internally by async_mainloop.
+
+        Return the number of events processed.
         """
-        while self.root.dooneevent(tkinter._tkinter.DONT_WAIT):
+        stats = self.update_stats
+        dooneevent = self.root.dooneevent
+        count = 0
+        while True:
+            start = time.perf_counter()
+            deadline = start + stats.budget
+            events = 0
+            pending = True
+            while events < self.slice_events:
+                if not dooneevent(tkinter._tkinter.DONT_WAIT):
+                    pending = False
+                    break
+                events += 1
+                if time.perf_counter() >= deadline:
+                    break
+            stats.record(events, time.perf_counter() - start, pending)
+            count += events
+            if not pending:
+                stats.budget = max(self.min_slice_budget, stats.budget / 2)
+                return count
+            stats.budget = min(self.max_slice_budget, stats.budget * 2)
             await asyncio.sleep(0)
@@ -0,0 +1,70 @@
+# Copyright (C) 2023 IKUS Software. All rights reserved.
+# IKUS Software inc. PROPRIETARY/CONFIDENTIAL.
+# Use is subject to license terms.
+"""
+Command line interface of tkvue.
+
+    python -m tkvue compile myapp/dialog.py
+
+Generate `myapp/dialog_tkvue.py` with the compiled templates of every
+component defined in `myapp/dialog.py`.
+"""
+import argparse
+import importlib
+import importlib.util
+import os
+import sys
+
+import tkvue
+
+
+def _import(name):
+    """
+    Import a module from a file path or a module name.
+    """
+    if not name.endswith(".py"):
+        return importlib.import_module(name)
+    path = os.path.abspath(name)
+    module_name = os.path.splitext(os.path.basename(path))[0]
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def compile_file(name):
+    """
+    Compile the templates of the given module and write the result next to it.
+    Return the path of the generated file.
+    """
+    module = _import(name)
+    source = tkvue.compile_module(module)
+    filename = os.path.splitext(module.__file__)[0] + "_tkvue.py"
+    with open(filename, "w", encoding="utf8") as f:
+        f.write(source)
+    return filename
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m tkvue")
+    subparsers = parser.add_subparsers(dest="command")
+    compile_parser = subparsers.add_parser("compile", help="compile component templates into Python builders")
+    compile_parser.add_argument("modules", nargs="+", metavar="MODULE", help="python file or module name")
+    args = parser.parse_args(args)
+    if args.command != "compile":
+        parser.print_help()
+        return 2
+    for name in args.modules:
+        try:
+            filename = compile_file(name)
+        except (ImportError, tkvue.TemplateError, SyntaxError) as e:
+            print("%s: %s" % (name, e), file=sys.stderr)
+            return 1
+        print("%s: %s" % (name, filename))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,8 +13,17 @@
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 # USA
+import asyncio
+import concurrent.futures
+import contextlib
+import copy
+import io
 import os
+import pickle
 import sys
+import tempfile
+import threading
+import time
 import tkinter
 import tkinter.ttk as ttk
 import unittest
@@ -23,6 +32,7 @@ from contextlib import contextmanager
 import pkg_resources
 
 import tkvue
+import tkvue.__main__
 
 NO_DISPLAY = not os.environ.get("DISPLAY", False)
 IS_LINUX = sys.platform in ["linux", "linux2"]
@@ -71,6 +81,117 @@ class DataTest(unittest.TestCase):
         )
         self.assertEqual(data.sum, 3)
 
+    def test_computed_cached(self):
+        # Given a computed value
+        calls = []
+
+        def total(store):
+            calls.append(1)
+            return store.var1 + store.var2
+
+        data = tkvue.Context({"var1": 1, "var2": 2, "var3": 3, "sum": tkvue.computed(total)})
+        # Given multiple watchers on the computed value
+        data.watch("sum", self.callback)
+        data.watch("sum * 2", self.callback)
+        self.assertEqual(1, len(calls))
+        # When reading the computed value
+        self.assertEqual(3, data.sum)
+        # Then computed value is not evaluated again
+        self.assertEqual(1, len(calls))
+        # When updating an unrelated value
+        data.var3 = 4
+        # Then computed value is not evaluated again
+        self.assertEqual(1, len(calls))
+        # When updating a dependency
+        data.var1 = 4
+        # Then computed value get evaluated once for all watchers
+        self.assertEqual(2, len(calls))
+        self.assertEqual(12, self.last_value)
+
+    def test_computed_nested(self):
+        # Given a computed value depending on another computed value
+        data = tkvue.Context(
+            {
+                "var1": 1,
+                "double": tkvue.computed(lambda store: store.var1 * 2),
+                "quad": tkvue.computed(lambda store: store.double * 2),
+            }
+        )
+        data.watch("quad", self.callback)
+        self.assertEqual(4, data.quad)
+        # When updating the dependency
+        data.var1 = 2
+        # Then computed values are invalidated
+        self.assertEqual(8, self.last_value)
+        self.assertEqual(4, data.double)
+
+    def test_computed_diamond(self):
+        # Given computed values with diamond dependencies
+        calls = []
+
+        def total(store):
+            calls.append(1)
+            return store.a + store.b
+
+        data = tkvue.Context(
+            {
+                "records": [1, 2, 3],
+                "a": tkvue.computed(lambda store: sum(store.records)),
+                "b": tkvue.computed(lambda store: len(store.records)),
+                "total": tkvue.computed(total),
+            }
+        )
+        values = []
+        data.watch("total", values.append)
+        data.watch("(a, b, total)", values.append)
+        self.assertEqual(1, len(calls))
+        # When updating the source
+        data.records = [1, 2, 3, 4]
+        # Then each computed and watcher get evaluated once with consistent values
+        self.assertEqual(2, len(calls))
+        self.assertEqual([14, (10, 4, 14)], values)
+
+    def test_computed_with_child_context(self):
+        # Given a computed value reading a key of child contexts
+        data = tkvue.Context(
+            {
+                "selected": 2,
+                "suffix": "root",
+                "is_sel": tkvue.computed(lambda store: store.item == store.selected),
+                "label": tkvue.computed(lambda store: "item-%s" % store.suffix),
+            }
+        )
+        children = [data.new_child(item=i, suffix=str(i)) for i in (1, 2, 3)]
+        # When reading the computed value from each child
+        # Then it get evaluated against the child context
+        self.assertEqual([False, True, False], [c.is_sel for c in children])
+        self.assertEqual(["item-1", "item-2", "item-3"], [c.get("label") for c in children])
+        self.assertEqual("item-root", data.label)
+        # When updating a key of the parent
+        data.selected = 3
+        # Then the computed value of every child is invalidated
+        self.assertEqual([False, False, True], [c.is_sel for c in children])
+
+    def test_computed_with_child_context_watch(self):
+        # Given a watcher on a computed value reading a key of a child context
+        data = tkvue.Context({"selected": 2, "is_sel": tkvue.computed(lambda store: store.item == store.selected)})
+        child1 = data.new_child(item=1)
+        child2 = data.new_child(item=2)
+        values1 = []
+        values2 = []
+        self.assertFalse(child1.watch("is_sel", values1.append))
+        self.assertTrue(child2.watch("is_sel", values2.append))
+        # When updating the child key
+        child1.item = 2
+        # Then only the watcher of this child is notified
+        self.assertEqual([True], values1)
+        self.assertEqual([], values2)
+        # When updating the parent key
+        data.selected = 1
+        # Then both watchers are notified
+        self.assertEqual([True, False], values1)
+        self.assertEqual([False], values2)
+
     def test_watch_with_variable(self):
         data = tkvue.Context({"var1": "foo"})
         data.watch("var1", self.callback)
@@ -108,12 +229,161 @@ class DataTest(unittest.TestCase):
         data.var1 = "foo"
         self.assertEqual(self.last_value, "bar")
 
+    def test_unwatch_remove_subscribers(self):
+        # Given a parent and child context with watchers
+        data = tkvue.Context({"var1": "foo", "var2": "bar"})
+        child = data.new_child(var3="rat")
+        child.watch("var1 + var3", self.callback)
+        data.watch("var2", self.callback)
+        self.assertEqual({"var1", "var2"}, set(data._subscribers))
+        self.assertEqual({"var3"}, set(child._subscribers))
+        # When removing the watchers
+        child.unwatch("var1 + var3", self.callback)
+        data.unwatch("var2", self.callback)
+        # Then subscribers index is empty
+        self.assertEqual({}, data._subscribers)
+        self.assertEqual({}, child._subscribers)
+
+    def test_notify_only_subscribers(self):
+        # Given many watchers on unrelated keys
+        data = tkvue.Context({"var%s" % i: i for i in range(100)})
+        calls = []
+        for i in range(1, 100):
+            data.watch("var%s" % i, calls.append)
+        data.watch("var0", self.callback)
+        # When updating a key
+        data.var0 = -1
+        # Then only the subscribed watcher is called
+        self.assertEqual(self.last_value, -1)
+        self.assertEqual([], calls)
+
+    def test_batch(self):
+        # Given a watcher on multiple keys
+        data = tkvue.Context({"var1": 1, "var2": 2, "var3": 3})
+        calls = []
+        data.watch("var1 + var2 + var3", calls.append)
+        # When updating multiple keys in a batch
+        with data.batch():
+            data.var1 = 10
+            data.var2 = 20
+            data.var3 = 30
+            # Then watcher is not notified
+            self.assertEqual([], calls)
+        # Then watcher is notified once with final value
+        self.assertEqual([60], calls)
+
+    def test_batch_nested(self):
+        # Given a watcher on multiple keys
+        data = tkvue.Context({"var1": 1, "var2": 2})
+        calls = []
+        data.watch("var1 + var2", calls.append)
+        # When updating keys in nested batch
+        with data.batch():
+            with data.batch():
+                data.var1 = 10
+            # Then watcher is notified at the end of outer batch
+            self.assertEqual([], calls)
+            data.var2 = 20
+        self.assertEqual([30], calls)
+
+    def test_batch_child(self):
+        # Given a watcher on child context
+        data = tkvue.Context({"var1": 1, "var2": 2})
+        child = data.new_child(var3=3)
+        calls = []
+        child.watch("var1 + var2 + var3", calls.append)
+        # When updating keys in batch from the child
+        with child.batch():
+            child.var1 = 10
+            child.var3 = 30
+        # Then watcher is notified once
+        self.assertEqual([42], calls)
+
+    def test_batch_decorator(self):
+        # Given a function decorated with batch
+        data = tkvue.Context({"var1": 1, "var2": 2})
+        calls = []
+        data.watch("var1 + var2", calls.append)
+
+        @data.batch()
+        def update():
+            data.var1 = 10
+            data.var2 = 20
+
+        # When calling the function
+        update()
+        # Then watcher is notified once
+        self.assertEqual([30], calls)
+
     def test_eval(self):
         data = tkvue.Context(
             {"var1": [1, 2, 3, 4]},
         )
         self.assertEqual(2, data.eval("var1[1]"))
 
+    def test_eval_with_compiled_expression(self):
+        data = tkvue.Context(
+            {"var1": [1, 2, 3, 4]},
+        )
+        expr = tkvue._compile("var1[1]")
+        # Then the compiled expression is cached
+        self.assertIs(expr, tkvue._compile("var1[1]"))
+        # Then compiled expression could be evaluated
+        self.assertEqual(2, data.eval(expr))
+
+    def test_expression_names(self):
+        # Given an expression with conditional branches
+        expr = tkvue._compile("var1 if cond else var2")
+        # Then all names are extracted
+        self.assertEqual({"var1", "var2", "cond"}, expr.names)
+        # Given an expression with comprehension and lambda
+        expr = tkvue._compile("[i * factor for i in items] + list(map(lambda x: x + 1, items))")
+        # Then local names are ignored
+        self.assertEqual({"factor", "items", "list", "map"}, expr.names)
+        # Given a comprehension iterating over a name shadowed by its target
+        expr = tkvue._compile("[item for item in item.children]")
+        # Then first iterable is read from the enclosing scope
+        self.assertEqual({"item"}, expr.names)
+        # Given a lambda argument shadowing a name
+        expr = tkvue._compile("x + (lambda x: x)(1)")
+        # Then name is read outside of the lambda
+        self.assertEqual({"x"}, expr.names)
+        # Given nested comprehensions
+        expr = tkvue._compile("{k: [v for v in values if v > k] for k in keys if k}")
+        # Then names bound by each generator are ignored
+        self.assertEqual({"values", "keys"}, expr.names)
+
+    def test_watch_comprehension_shadowed(self):
+        # Given a watcher on a comprehension shadowing a context variable
+        data = tkvue.Context({"item": {"children": [1, 2]}})
+        values = []
+        data.watch("[item for item in item['children']]", values.append)
+        # When updating the variable
+        data.item = {"children": [3]}
+        # Then watcher is notified
+        self.assertEqual([[3]], values)
+
+    def test_watch_conditional_branch(self):
+        # Given a watcher on a conditional expression
+        data = tkvue.Context({"var1": "foo", "var2": "bar", "cond": False})
+        data.watch("var1 if cond else var2", self.callback)
+        # When updating the branch not evaluated
+        data.var1 = "rat"
+        # Then watcher is notified
+        self.assertEqual(self.last_value, "bar")
+        # When switching the branch
+        data.cond = True
+        self.assertEqual(self.last_value, "rat")
+        # When updating the other branch
+        data.var1 = "foo"
+        self.assertEqual(self.last_value, "foo")
+
+    def test_eval_invalid_expression(self):
+        data = tkvue.Context({"var1": 1})
+        with self.assertRaises(Exception) as ctx:
+            data.eval("var1 +")
+        self.assertIn("var1 +", str(ctx.exception))
+
     def test_watch_list_item(self):
         data = tkvue.Context(
             {"var1": [1, 2, 3, 4]},
@@ -181,6 +451,118 @@ class DataTest(unittest.TestCase):
         # Then the value is update into the parent context.
         self.assertEqual(data.var1, "bar")
 
+    def test_nested_child_lookup(self):
+        # Given deeply nested child contexts
+        data = tkvue.Context({"var1": "foo"})
+        child = data
+        for i in range(20):
+            child = child.new_child(**{"var%s" % (i + 2): i})
+        # Then keys are resolved from any level
+        self.assertEqual("foo", child.var1)
+        self.assertEqual(19, child.var21)
+        self.assertIn("var1", child)
+        self.assertNotIn("undefined", child)
+        with self.assertRaises(KeyError):
+            child["undefined"]
+        # When setting a value from the child context
+        child.var1 = "bar"
+        # Then the value is updated in the parent context.
+        self.assertEqual("bar", data.var1)
+        self.assertEqual("bar", child.var1)
+
+    def test_nested_child_delete(self):
+        # Given a child context shadowing a parent key
+        data = tkvue.Context({"var1": "foo"})
+        child = data.new_child(var1="bar")
+        grandchild = child.new_child()
+        self.assertEqual("bar", grandchild.var1)
+        # When deleting the key from the child
+        del child["var1"]
+        # Then the parent key is visible
+        self.assertEqual("foo", grandchild.var1)
+        # When deleting the key from the parent
+        del data["var1"]
+        # Then the key is undefined
+        self.assertNotIn("var1", grandchild)
+
+    def test_reactive_list_events(self):
+        # Given a reactive list
+        events = []
+        items = tkvue.ReactiveList([1, 2, 3])
+        items.subscribe(lambda collection, event: events.append(event))
+        # When mutating the list
+        items.append(4)
+        items.insert(0, 0)
+        items.pop()
+        items[1] = 5
+        del items[1:3]
+        # Then splice events are emitted
+        self.assertEqual(
+            [
+                tkvue.ListSplice(3, [], [4]),
+                tkvue.ListSplice(0, [], [0]),
+                tkvue.ListSplice(4, [4], []),
+                tkvue.ListSplice(1, [1], [5]),
+                tkvue.ListSplice(1, [5, 2], []),
+            ],
+            events,
+        )
+        self.assertEqual([0, 3], items)
+
+    def test_reactive_dict_events(self):
+        # Given a reactive dict
+        events = []
+        values = tkvue.ReactiveDict({"a": 1})
+        values.subscribe(lambda collection, event: events.append(event))
+        # When mutating the dict
+        values["b"] = 2
+        del values["a"]
+        values |= {"c": 3}
+        # Then update events are emitted
+        self.assertEqual(
+            [tkvue.DictUpdate("b", 2, False), tkvue.DictUpdate("a", None, True), tkvue.DictUpdate("c", 3, False)],
+            events,
+        )
+        self.assertIsInstance(values, tkvue.ReactiveDict)
+
+    def test_reactive_list_copy(self):
+        # Given a reactive list stored in a context
+        items = tkvue.ReactiveList([1, 2])
+        data = tkvue.Context({"items": items})
+        data.watch("len(items)", self.callback)
+        self.last_value = None
+        # When mutating a copy of the list
+        copy.copy(items).append(3)
+        # Then watchers of the original list are not notified
+        self.assertIsNone(self.last_value)
+        # Then list could be deep copied and pickled
+        self.assertEqual([1, 2], copy.deepcopy(items))
+        self.assertEqual([1, 2], pickle.loads(pickle.dumps(items)))
+        self.assertIsInstance(pickle.loads(pickle.dumps(items)), tkvue.ReactiveList)
+
+    def test_watch_reactive_list(self):
+        # Given a watcher on a reactive list
+        items = tkvue.ReactiveList([1, 2, 3])
+        data = tkvue.Context({"items": items})
+        data.watch("len(items)", self.callback)
+        # When mutating the list in place
+        items.append(4)
+        # Then the watcher is notified
+        self.assertEqual(4, self.last_value)
+        # When replacing the list
+        data.items = tkvue.ReactiveList([1])
+        self.assertEqual(1, self.last_value)
+        # Then previous list is not observed anymore
+        items.append(5)
+        self.assertEqual(1, self.last_value)
+
+    def test_longest_increasing_subsequence(self):
+        self.assertEqual(set(), tkvue._longest_increasing_subsequence([]))
+        self.assertEqual({0, 1, 2}, tkvue._longest_increasing_subsequence([0, 1, 2]))
+        self.assertEqual({1, 2}, tkvue._longest_increasing_subsequence([2, 0, 1]))
+        self.assertEqual({1, 2, 4}, tkvue._longest_increasing_subsequence([3, 0, 1, -1, 2]))
+        self.assertEqual(1, len(tkvue._longest_increasing_subsequence([2, 1, 0])))
+
     def test_computed_dependencies_updated(self):
         # Given a parent context
         data = tkvue.Context(
@@ -195,6 +577,823 @@ class DataTest(unittest.TestCase):
         self.assertEqual(self.last_value, False)
 
 
+class TemplateTest(unittest.TestCase):
+    def test_parse_cached(self):
+        # Given a template
+        template = '<Frame><Label text="{{ name }}" pack-side="left" /></Frame>'
+        # When parsing the template twice
+        tree = tkvue._parse(template)
+        # Then the same tree is returned
+        self.assertIs(tree, tkvue._parse(template))
+        # Then attributes are preprocessed once
+        attrs = tree.children[0].attributes()
+        self.assertIs(attrs, tree.children[0].attributes())
+        self.assertEqual({'side': 'left'}, attrs.geo_attrs)
+        self.assertEqual('text', attrs.options[0][0])
+        self.assertEqual({'name'}, attrs.options[0][1].names)
+
+    def test_attr_handler(self):
+        # Given a widget class without custom handler
+        class MyLabel(ttk.Label):
+            pass
+
+        # Then handler is resolved from parent class
+        self.assertEqual(tkvue._configure_text, tkvue._attr_handler(MyLabel, "text"))
+        self.assertIsNone(tkvue._attr_handler(MyLabel, "width"))
+
+        # When registering a new handler
+        @tkvue.attr(MyLabel, "text")
+        def _configure_my_text(widget, value):
+            pass
+
+        # Then new handler is used
+        self.assertEqual(_configure_my_text, tkvue._attr_handler(MyLabel, "text"))
+        self.assertEqual(tkvue._configure_text, tkvue._attr_handler(ttk.Label, "text"))
+
+
+class CompilerTest(unittest.TestCase):
+    def _restore_builders(self):
+        # Forget about the builders registered by the test.
+        builders = dict(tkvue._builders)
+        compiled_modules = set(tkvue._compiled_modules)
+        self.addCleanup(tkvue._builders.update, builders)
+        self.addCleanup(tkvue._builders.clear)
+        self.addCleanup(tkvue._compiled_modules.update, compiled_modules)
+        self.addCleanup(tkvue._compiled_modules.clear)
+
+    def test_compile_template(self):
+        self._restore_builders()
+        # Given a template
+        template = """<Frame pack-fill="x"><Label id="lbl" text="{{ name }}" width="4" /><Label for="i in items" text="{{ i }}" /></Frame>"""
+
+        # Given a builder recording the calls
+        class Widget:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append((name,) + args + tuple(kwargs.items()))
+
+        class Vue:
+            def _create_widget(self, *args):
+                calls.append(("_create_widget",) + args)
+                return Widget()
+
+            def _walk(self, *args):
+                calls.append(("_walk",) + args)
+
+        calls = []
+        # When compiling the template
+        source = tkvue.compile_template(template)
+        exec(compile(source, "<compiled>", "exec"), {})
+        # Then a builder is registered for this template
+        builder = tkvue._find_builder(tkvue.Component, template)
+        self.assertIsNotNone(builder)
+        # Then builder create widgets and apply static attributes directly
+        builder(Vue(), "master", tkvue.Context({"name": "foo", "items": []}))
+        self.assertEqual(('_create_widget', 'master', 'frame', None, None), calls[0][:5])
+        self.assertEqual(('pack', {'fill': 'x'}), calls[1])
+        self.assertEqual(('_create_widget', 'label', None, 'lbl'), calls[2][:1] + calls[2][2:5])
+        self.assertEqual(('pack', {}), calls[3])
+        # Then bindings are watched
+        self.assertEqual(('configure', ('text', 'foo')), calls[4])
+        self.assertEqual('bind', calls[5][0])
+        self.assertEqual(('configure', ('width', '4')), calls[6])
+        self.assertEqual('_walk', calls[7][0])
+        self.assertEqual('i in items', calls[7][2].attrs['for'])
+        # Then static values are not interpreted when building
+        self.assertNotIn("_bind_option", source)
+
+    def test_compile_template_error(self):
+        self._restore_builders()
+        # Given a compiled template with an invalid expression
+        template = """<Label text="{{ missing }}" />"""
+        exec(compile(tkvue.compile_template(template), "<compiled>", "exec"), {})
+        builder = tkvue._find_builder(tkvue.Component, template)
+
+        class Vue:
+            def _create_widget(self, *args):
+                return ttk.Label.__new__(ttk.Label)
+
+        # When building the template
+        # Then the same error is raised as the interpreter
+        with self.assertRaises(tkvue.TemplateError) as cm:
+            builder(Vue(), "master", tkvue.Context())
+        self.assertIn('for tag <label text="{{ missing }}">', str(cm.exception))
+
+    def test_compile_template_handler_changed(self):
+        self._restore_builders()
+        # Given a compiled template
+        template = """<Label text="foo" />"""
+        exec(compile(tkvue.compile_template(template), "<compiled>", "exec"), {})
+        self.assertIsNotNone(tkvue._find_builder(tkvue.Component, template))
+        # When registering a new attribute handler used by the template
+        self.addCleanup(tkvue._attrs_cache.clear)
+        self.addCleanup(tkvue._attrs.pop, (ttk.Label, "text"))
+
+        @tkvue.attr(ttk.Label, "text")
+        def _configure_my_text(widget, value):
+            pass
+
+        # Then the compiled builder is not used anymore
+        self.assertIsNone(tkvue._find_builder(tkvue.Component, template))
+
+    def test_compile_module_broken(self):
+        self._restore_builders()
+        self.addCleanup(sys.modules.pop, "broken_dialog_tkvue", None)
+        path = list(sys.path)
+        self.addCleanup(sys.path.extend, path)
+        self.addCleanup(sys.path.clear)
+        cls = type("BrokenDialog", (tkvue.Component,), {"__module__": "broken_dialog", "template": "<Label />"})
+        with tempfile.TemporaryDirectory() as tmp:
+            # Given a compiled module failing to register its builders
+            with open(os.path.join(tmp, "broken_dialog_tkvue.py"), "w") as f:
+                f.write('import tkvue\n\ntkvue.register_builder("key", build)\n')
+            sys.path.insert(0, tmp)
+            # When looking for the builder
+            with self.assertLogs("tkvue", level="WARNING") as cm:
+                builder = tkvue._find_builder(cls, cls.template)
+            # Then the error is logged and the template interpreter is used
+            self.assertIsNone(builder)
+            self.assertIn("fail to load compiled templates broken_dialog_tkvue", cm.output[0])
+
+    def test_compile_cli(self):
+        self._restore_builders()
+        self.addCleanup(sys.modules.pop, "compiled_dialog", None)
+        self.addCleanup(sys.modules.pop, "compiled_dialog_tkvue", None)
+        path = list(sys.path)
+        self.addCleanup(sys.path.extend, path)
+        self.addCleanup(sys.path.clear)
+        # Given a module with a component
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "compiled_dialog.py")
+            with open(filename, "w") as f:
+                f.write(
+                    'import tkvue\n\nclass CompiledDialog(tkvue.Component):\n    template = "<Label text=\'foo\' />"\n'
+                )
+            # When compiling the module
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(0, tkvue.__main__.main(["compile", filename]))
+            # Then compiled module is created next to the module
+            self.assertTrue(os.path.exists(os.path.join(tmp, "compiled_dialog_tkvue.py")))
+            # Then compiled builder is found for the component
+            cls = sys.modules["compiled_dialog"].CompiledDialog
+            self.assertIsNotNone(tkvue._find_builder(cls, cls.template))
+
+
+class FakeImage:
+    def __init__(self, width, height):
+        self._width = width
+        self._height = height
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+
+class FakeMaster:
+    def after(self, ms, func):
+        self.poll = func
+
+
+class FakeImageCache(tkvue.ImageCache):
+    """
+    Image cache returning fake images of the given size instead of decoding files.
+    """
+
+    def __init__(self, master, max_size=None, image_size=(10, 10)):
+        super().__init__(master, max_size=max_size)
+        self.image_size = image_size
+        self.loads = []
+
+    def _load(self, path=None, data=None):
+        self.loads.append(path)
+        return [FakeImage(*self.image_size)]
+
+
+class ImageCacheTest(unittest.TestCase):
+    def test_image_cache(self):
+        # Given an image cache with a limited size
+        cache = FakeImageCache(master=None, max_size=800)
+        # When acquiring the same image twice
+        key1, frames1 = cache.acquire("image1.png")
+        key2, frames2 = cache.acquire("image1.png")
+        # Then image is shared
+        self.assertEqual(key1, key2)
+        self.assertIs(frames1, frames2)
+        self.assertEqual(400, cache.size)
+        # When releasing the image once
+        cache.release(key1)
+        # Then image is still in use
+        self.assertEqual({}, cache.unused)
+        # When releasing the image
+        cache.release(key1)
+        # Then unused image is kept within the limit
+        self.assertIn(key1, cache.entries)
+        # When other images are unused
+        key3, unused = cache.acquire("image2.png")
+        key4, unused = cache.acquire("image3.png")
+        cache.release(key3)
+        # Then least recently used images are freed
+        self.assertNotIn(key1, cache.entries)
+        self.assertIn(key3, cache.entries)
+        self.assertIn(key4, cache.entries)
+        self.assertEqual(800, cache.size)
+
+    def test_image_cache_async(self):
+        # Given an image cache decoding images in worker thread
+        cache = FakeImageCache(master=FakeMaster())
+        loaded = []
+        # When loading an image asynchronously
+        cancel1 = cache.acquire_async(pkg_resources.resource_filename(__name__, "python_icon.png"), loaded.append)
+        cache.acquire_async(
+            pkg_resources.resource_filename(__name__, "python_icon.png"), lambda key, frames: loaded.append(key)
+        )
+        # When loading is cancelled for one of the widget
+        cancel1()
+        # Then image get loaded once
+        self.assertEqual(1, len(cache.loading))
+        concurrent.futures.wait([cache.loading[key][0] for key in cache.loading])
+        cache.master.poll()
+        # Then only the other widget receive the image
+        self.assertEqual(1, len(loaded))
+        self.assertEqual(1, cache.entries[loaded[0]][1])
+        self.assertEqual({}, cache.loading)
+
+    def test_image_cache_async_cancel(self):
+        # Given an image cache decoding images in worker thread
+        cache = FakeImageCache(master=FakeMaster())
+        path = pkg_resources.resource_filename(__name__, "python_icon.png")
+        loaded = []
+        # Given a worker thread busy with another image
+        release = threading.Event()
+        tkvue._get_image_executor()
+        busy = [tkvue._image_executor.submit(release.wait, 5) for unused in range(2)]
+        self.addCleanup(release.set)
+        # When loading is cancelled before the image get decoded
+        cancel = cache.acquire_async(path, loaded.append)
+        cancel()
+        # When loading the same image again
+        cache.acquire_async(path, lambda key, frames: loaded.append(key))
+        release.set()
+        concurrent.futures.wait(busy + [cache.loading[key][0] for key in cache.loading])
+        cache.master.poll()
+        # Then image get loaded for the new request
+        self.assertEqual(1, len(loaded))
+        self.assertEqual(1, cache.entries[loaded[0]][1])
+
+    def test_image_sprite_sheet(self):
+        # Given an image cache
+        slices = []
+
+        class ImageCache(FakeImageCache):
+            def _slice(self, sheet, path, region):
+                slices.append((path, region))
+                return [FakeImage(10, 10)]
+
+        cache = ImageCache(master=None, image_size=(20, 10))
+        # When acquiring multiple regions of the same sheet
+        cache.acquire("icons.png#10x10")
+        cache.acquire("icons.png#10x10:1")
+        cache.acquire("icons.png#10x10:1")
+        # Then sheet get loaded once
+        self.assertEqual(["icons.png"], cache.loads)
+        # Then each region is sliced once
+        self.assertEqual([("icons.png", "#10x10"), ("icons.png", "#10x10:1")], slices)
+
+    def test_split_region(self):
+        # Given an atlas with named regions
+        tkvue.register_atlas("icons.png", {"save": (0, 0, 10, 10)})
+        self.addCleanup(tkvue._atlases.pop, os.path.abspath("icons.png"), None)
+        # Then regions are split from the path
+        self.assertEqual(("icons.png", "#10x10"), tkvue._split_region("icons.png#10x10"))
+        self.assertEqual(("icons.png", "#10x10:2"), tkvue._split_region("icons.png#10x10:2"))
+        self.assertEqual(("icons.png", "#save"), tkvue._split_region("icons.png#save"))
+        self.assertEqual(("icons.png", ""), tkvue._split_region("icons.png"))
+        # Then file names containing `#` are kept as is
+        self.assertEqual(("/home/u/C#/icon.png", ""), tkvue._split_region("/home/u/C#/icon.png"))
+        self.assertEqual(("icon#2.png", ""), tkvue._split_region("icon#2.png"))
+        self.assertEqual(("icons.png#open", ""), tkvue._split_region("icons.png#open"))
+
+    def test_gif_durations(self):
+        with open(pkg_resources.resource_filename(__name__, "preloader.gif"), "rb") as f:
+            self.assertEqual([130] * 8, tkvue._gif_durations(f.read()))
+        self.assertIsNone(tkvue._gif_durations(b"\x89PNG"))
+
+    @unittest.skipIf(tkvue.Image is None, "require Pillow")
+    def test_decode_image_frames(self):
+        # Given an animated gif
+        path = pkg_resources.resource_filename(__name__, "preloader.gif")
+        # When decoding the image
+        frames, durations = tkvue._decode_image(path)
+        # Then each frame is decoded
+        self.assertGreater(len(frames), 1)
+        self.assertEqual(len(frames), len(set(frame.tobytes() for frame in frames)))
+        self.assertEqual(len(frames), len(durations))
+
+
+class AnimationClockTest(unittest.TestCase):
+    def test_animation_clock(self):
+        # Given an animation clock
+        class Master:
+            timers = []
+
+            def after(self, ms, func):
+                self.timers.append(func)
+                return len(self.timers)
+
+            def after_cancel(self, timer):
+                pass
+
+            def bind(self, sequence, func, add=None):
+                self.resume = func
+
+        class Widget:
+            frames = ["frame0", "frame1"]
+            durations = [10, 20]
+            frame = 0
+            viewable = True
+
+            def winfo_toplevel(self):
+                return master
+
+            def winfo_viewable(self):
+                return self.viewable
+
+            def bind(self, sequence, func, add=None):
+                return "destroy"
+
+            def configure(self, image):
+                self.image = image
+
+        master = Master()
+        clock = tkvue.AnimationClock(master)
+        clock._now = lambda: now
+        widget1 = Widget()
+        widget2 = Widget()
+        # When adding animations
+        now = 0
+        clock.add(widget1)
+        clock.add(widget2)
+        # Then a single timer is used
+        self.assertEqual(1, len(master.timers))
+        # When the clock tick
+        now = 10
+        master.timers[-1]()
+        # Then both animations advance to next frame with frame duration
+        self.assertEqual("frame1", widget1.image)
+        self.assertEqual("frame1", widget2.image)
+        self.assertEqual({widget1: 30, widget2: 30}, clock.animations)
+        # When a widget is not viewable
+        widget2.viewable = False
+        now = 30
+        master.timers[-1]()
+        # Then it's animation is suspended
+        self.assertEqual({widget1: 40, widget2: None}, clock.animations)
+        # When the window get mapped
+        widget2.viewable = True
+        master.resume()
+        # Then animation resume
+        self.assertEqual({widget1: 40, widget2: 30}, clock.animations)
+
+
+class MainloopTest(unittest.TestCase):
+    def test_wakeup_event_loop(self):
+        # Given an event loop waiting for updates
+        calls = []
+
+        def wakeup():
+            calls.append(1)
+
+        tkvue._wakeups.add(wakeup)
+        self.addCleanup(tkvue._wakeups.discard, wakeup)
+        data = tkvue.Context({"var1": 1, "var2": 2})
+        data.watch("var1", lambda value: None)
+        # When updating an unwatched value
+        data.var2 = 3
+        # Then event loop is not woken up
+        self.assertEqual([], calls)
+        # When updating a watched value
+        data.var1 = 2
+        # Then event loop is woken up
+        self.assertEqual(1, len(calls))
+
+    def test_next_timeout(self):
+        # Given a component with an animation clock timer
+        class Clock:
+            timer = "after#1"
+            deadline = None
+
+        class Tk:
+            timers = {"after#1": "timer"}
+
+            def call(self, *args):
+                if len(args) > 2:
+                    return ("script", self.timers[args[2]])
+                return tuple(self.timers)
+
+            def splitlist(self, value):
+                return value
+
+        class Root:
+            tk = Tk()
+            _animation_clock = Clock()
+
+        component = tkvue.Component.__new__(tkvue.Component)
+        component.root = Root()
+
+        async def main():
+            # When the next frame is due in 30ms
+            Clock.deadline = time.monotonic() * 1000 + 30
+            timeout = component._next_timeout(0.1)
+            # Then event loop wakes up in time
+            self.assertLessEqual(timeout, 0.03)
+            self.assertGreater(timeout, 0.02)
+            # When another Tk timer is pending
+            Tk.timers = {"after#1": "timer", "after#2": "timer"}
+            # Then Tk timers are polled
+            self.assertEqual(component.poll_timeout, component._next_timeout(0.1))
+            # When an idle callback is pending
+            Tk.timers = {"after#1": "timer", "after#3": "idle"}
+            # Then Tk get processed as soon as possible
+            self.assertEqual(component.min_timeout, component._next_timeout(0.1))
+            # When other tasks are running
+            Tk.timers = {}
+            Root._animation_clock = None
+            task = asyncio.get_running_loop().create_task(asyncio.sleep(1))
+            # Then event loop wakes up to redraw widgets
+            self.assertEqual(component.poll_timeout, component._next_timeout(0.1))
+            task.cancel()
+
+        asyncio.run(main())
+
+    def test_update_root_slices(self):
+        # Given a component with pending Tk events
+        class Root:
+            pending = 500
+
+            def dooneevent(self, flags):
+                if self.pending:
+                    self.pending -= 1
+                    return True
+                return False
+
+        component = tkvue.Component.__new__(tkvue.Component)
+        component.root = Root()
+        component.update_stats = tkvue.UpdateStats(budget=1)
+        # When processing the events
+        count = asyncio.run(component._update_root())
+        # Then events are processed in multiple slices
+        self.assertEqual(500, count)
+        self.assertEqual(3, component.update_stats.slices)
+        self.assertEqual(500, component.update_stats.events)
+        self.assertEqual(2, component.update_stats.backlog)
+        # Then time budget is adapted
+        self.assertEqual(component.max_slice_budget / 2, component.update_stats.budget)
+
+
+class ThreadsafeTest(unittest.TestCase):
+    def test_set_threadsafe(self):
+        # Given a context watched by the UI thread
+        data = tkvue.Context({"var1": 0})
+        values = []
+        data.watch("var1", values.append)
+        calls = []
+
+        class Loop:
+            def call_soon_threadsafe(self, func):
+                calls.append(func)
+
+        tkvue._thread_updates.loop = Loop()
+        self.addCleanup(setattr, tkvue._thread_updates, "loop", None)
+
+        # When updating the context from another thread
+        def worker():
+            for i in range(1, 1001):
+                data.set_threadsafe("var1", i)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        # Then context is not updated
+        self.assertEqual(0, data.var1)
+        # Then UI thread is woken up once
+        self.assertEqual(1, len(calls))
+        # When updates get applied by the UI thread
+        calls[0]()
+        # Then watcher is notified once with the latest value
+        self.assertEqual([1000], values)
+
+    def test_set_from_other_thread_in_debug(self):
+        # Given debug mode is enabled
+        self.addCleanup(setattr, tkvue, "debug", tkvue.debug)
+        tkvue.debug = True
+        data = tkvue.Context({"var1": 0})
+        errors = []
+
+        # When updating the context directly from another thread
+        def worker():
+            try:
+                data.var1 = 1
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        # Then an error is reported
+        self.assertEqual(1, len(errors))
+        # Then context is left unchanged
+        self.assertEqual(0, data.var1)
+
+    def test_mutate_collection_from_other_thread_in_debug(self):
+        # Given debug mode is enabled
+        self.addCleanup(setattr, tkvue, "debug", tkvue.debug)
+        tkvue.debug = True
+        data = tkvue.Context({"records": tkvue.ReactiveList([1, 2])})
+        errors = []
+
+        # When mutating a reactive list from another thread
+        def worker():
+            try:
+                data.records.append(3)
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        # Then an error is reported
+        self.assertEqual(1, len(errors))
+        # Then the list is left unchanged
+        self.assertEqual([1, 2], data.records)
+
+
+class JobTest(unittest.TestCase):
+    def test_job(self):
+        # Given a component with a background job
+        started = threading.Event()
+        release = threading.Event()
+
+        class Component:
+            data = tkvue.Context()
+
+            @tkvue.job(progress=True)
+            def load(self, value, progress):
+                started.set()
+                progress(0.5)
+                release.wait(5)
+                progress(1)
+                if value is None:
+                    raise ValueError("missing value")
+                return value * 2
+
+        component = Component()
+        component.data.setdefault("load", tkvue.JobState())
+        # When starting the job
+        future = component.load(21)
+        started.wait(5)
+        # Then job is running
+        self.assertTrue(component.data.load.running)
+        # When job completes
+        release.set()
+        self.assertEqual(42, future.result(5))
+        tkvue._thread_updates.apply()
+        # Then result is available in the context
+        self.assertEqual(tkvue.JobState(running=False, progress=1, result=42, error=None), component.data.load)
+        # When job fails
+        component.load(None).exception(5)
+        tkvue._thread_updates.apply()
+        # Then error is available in the context
+        self.assertFalse(component.data.load.running)
+        self.assertIsInstance(component.data.load.error, ValueError)
+
+    def test_job_latest(self):
+        # Given a component with a running job
+        release = threading.Event()
+
+        class Component:
+            data = tkvue.Context({"load": tkvue.JobState()})
+
+            @tkvue.job(progress=True)
+            def load(self, value, progress):
+                release.wait(5)
+                progress(1)
+                return value
+
+        component = Component()
+        first = component.load(1)
+        # When starting the job again
+        second = component.load(2)
+        release.set()
+        # Then previous run is cancelled
+        with self.assertRaises(concurrent.futures.CancelledError):
+            first.result(5)
+        # Then result of latest run is available
+        self.assertEqual(2, second.result(5))
+        tkvue._thread_updates.apply()
+        self.assertEqual(2, component.data.load.result)
+        self.assertFalse(component.data.load.running)
+
+    def test_job_cancel(self):
+        # Given a component with a running job
+        started = threading.Event()
+        release = threading.Event()
+
+        class Component:
+            data = tkvue.Context({"load": tkvue.JobState()})
+
+            @tkvue.job(progress=True)
+            def load(self, progress):
+                started.set()
+                release.wait(5)
+                progress(1)
+
+        component = Component()
+        future = component.load()
+        started.wait(5)
+        # When cancelling the job
+        component.load.cancel()
+        release.set()
+        # Then job is interrupted
+        with self.assertRaises(concurrent.futures.CancelledError):
+            future.result(5)
+        tkvue._thread_updates.apply()
+        self.assertEqual(tkvue.JobState(), component.data.load)
+
+
+class AsyncCommandTest(unittest.TestCase):
+    def test_async_command(self):
+        # Given coroutine commands with each policy
+        calls = []
+
+        async def handler(value):
+            calls.append(("start", value))
+            await asyncio.sleep(0.01)
+            calls.append(("end", value))
+
+        async def main(policy):
+            values = iter(range(3))
+            command = tkvue._AsyncCommand(lambda: handler(next(values)), policy=policy)
+            # When invoking the command multiple times
+            for unused in range(3):
+                command()
+                await asyncio.sleep(0)
+            while command.task is not None:
+                await asyncio.sleep(0.01)
+
+        # Then other invocations are dropped while running
+        asyncio.run(main("drop"))
+        self.assertEqual([("start", 0), ("end", 0)], calls)
+        # Then invocations are run one after the other
+        calls.clear()
+        asyncio.run(main("queue"))
+        self.assertEqual([("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)], calls)
+        # Then previous task is cancelled
+        calls.clear()
+        asyncio.run(main("restart"))
+        self.assertEqual([("start", 0), ("start", 1), ("start", 2), ("end", 2)], calls)
+
+    def test_async_command_outside_loop(self):
+        # Given a coroutine command
+        coros = []
+
+        async def handler():
+            pass
+
+        command = tkvue._AsyncCommand(lambda: coros.append(handler()) or coros[-1])
+        # When invoking the command without event loop
+        # Then an error is raised
+        with self.assertRaises(RuntimeError):
+            command()
+        # Then coroutine is closed
+        self.assertIsNone(coros[0].cr_frame)
+
+    def test_async_command_outside_loop_with_mainloop(self):
+        # Given a coroutine command
+        done = []
+
+        async def handler():
+            done.append(1)
+
+        command = tkvue._AsyncCommand(handler)
+        # Given the component mainloop is running
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        self.addCleanup(setattr, tkvue, "_mainloop_loop", None)
+        tkvue._mainloop_loop = loop
+        # When invoking the command outside of the event loop
+        command()
+        # Then coroutine is run by the mainloop
+        loop.run_until_complete(command.task)
+        self.assertEqual([1], done)
+
+    def test_async_command_disable(self):
+        # Given a ttk widget recording its state flags
+        class Button(ttk.Button):
+            def state(self, statespec):
+                # Return the previous value of the changed flags like ttk.
+                changed = ()
+                for flag in statespec:
+                    name = flag.lstrip("!")
+                    enabled = not flag.startswith("!")
+                    if (name in self.flags) != enabled:
+                        changed += (name if name in self.flags else "!" + name,)
+                        if enabled:
+                            self.flags.add(name)
+                        else:
+                            self.flags.discard(name)
+                return changed
+
+        async def handler():
+            await asyncio.sleep(0)
+
+        async def main(widget):
+            command = tkvue._AsyncCommand(handler, disable=True)
+            command.widget = widget
+            command()
+            self.assertEqual({"disabled"}, widget.flags)
+            await command.task
+
+        # Given an enabled widget
+        widget = Button.__new__(Button)
+        widget.flags = set()
+        # When running a coroutine command disabling the widget
+        asyncio.run(main(widget))
+        # Then widget is enabled again
+        self.assertEqual(set(), widget.flags)
+        # Given a widget disabled by a binding
+        widget.flags = {"disabled"}
+        # When running the command
+        asyncio.run(main(widget))
+        # Then widget stays disabled
+        self.assertEqual({"disabled"}, widget.flags)
+
+    def test_async_command_policy(self):
+        # Given a component with a decorated coroutine function
+        class Component:
+            @tkvue.command(policy="queue", disable=True)
+            async def refresh(self):
+                pass
+
+        vue = tkvue.TkVue.__new__(tkvue.TkVue)
+        vue.component = Component()
+        vue._functions = {}
+        # When creating the command
+        command = vue._create_command("refresh", tkvue.Context())
+        # Then command is scheduled according to the policy
+        self.assertIsInstance(command, tkvue._AsyncCommand)
+        self.assertEqual("queue", command.policy)
+        self.assertTrue(command.disable)
+        # Then expressions calling a coroutine are also scheduled
+        self.assertIsInstance(vue._create_command("refresh()", tkvue.Context()), tkvue._AsyncCommand)
+
+
+class ModalTest(unittest.TestCase):
+    def test_show_modal(self):
+        # Given a dialog component
+        calls = []
+
+        class Root:
+            master = None
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append(name)
+
+            def winfo_viewable(self):
+                return True
+
+        dlg = tkvue.Component.__new__(tkvue.Component)
+        dlg.root = Root()
+        dlg._modal = None
+
+        async def main():
+            # When showing the dialog
+            task = asyncio.get_running_loop().create_task(dlg.show_modal())
+            while "grab_set" not in calls:
+                await asyncio.sleep(0)
+            # Then event loop keeps running while dialog is shown
+            await asyncio.sleep(0.01)
+            self.assertFalse(task.done())
+            # When closing the dialog
+            dlg.close_modal("value")
+            return await task
+
+        # Then result is returned
+        self.assertEqual("value", asyncio.run(main()))
+        # Then dialog is withdrawn to be reused
+        self.assertEqual(["bind", "protocol", "deiconify", "grab_set", "grab_release", "withdraw"], calls)
+
+        # When showing the dialog again
+        async def again():
+            asyncio.get_running_loop().call_later(0.01, dlg.close_modal)
+            return await dlg.show_modal()
+
+        calls.clear()
+        # Then same instance is shown
+        self.assertIsNone(asyncio.run(again()))
+        self.assertNotIn("bind", calls)
+
+
 class CustomComponent(tkvue.Component):
     template = """
     <Frame pack-fill="x" pack-expand="1">
@@ -301,6 +1500,36 @@ class DialogWithLoop(tkvue.Component):
         super().__init__(master=master)
 
 
+class DialogWithKeyedLoop(tkvue.Component):
+    template = """
+    <TopLevel>
+        <Label text="{{item['name']}}" for="item in items" key="{{item['id']}}"/>
+    </TopLevel>
+    """
+
+    def __init__(self, master=None):
+        self.data = tkvue.Context({"items": [{"id": i, "name": "item%s" % i} for i in range(5)]})
+        super().__init__(master=master)
+
+
+class DialogWithLoopCommand(tkvue.Component):
+    template = """
+    <TopLevel>
+        <Frame id="frame">
+            <Button text="{{item}}" for="item in records" command="select(item)"/>
+        </Frame>
+    </TopLevel>
+    """
+
+    def __init__(self, master=None):
+        self.data = tkvue.Context({"records": ["a", "b", "c"]})
+        self.selected = []
+        super().__init__(master=master)
+
+    def select(self, item):
+        self.selected.append(item)
+
+
 class DialogWithScrolledFrame(tkvue.Component):
     template = """
     <TopLevel geometry="500x500">
@@ -313,6 +1542,20 @@ class DialogWithScrolledFrame(tkvue.Component):
     """
 
 
+class DialogWithVirtualScrolledFrame(tkvue.Component):
+    template = """
+    <TopLevel geometry="500x500">
+        <ScrolledFrame id="scrolled_frame" virtual="1" rowheight="20" pack-fill="both" pack-expand="1">
+            <Label text="{{item}}" for="item in items"/>
+        </ScrolledFrame>
+    </TopLevel>
+    """
+
+    def __init__(self, master=None):
+        self.data = tkvue.Context({"items": list(range(50000))})
+        super().__init__(master=master)
+
+
 class DialogWithInvalidCommand(tkvue.Component):
     template = """
     <Frame>
@@ -506,6 +1749,37 @@ class ComponentTest(unittest.TestCase):
             # Then set image to None
             dlg.data["image_path"] = ''
 
+    def test_image_path_shared(self):
+        with new_dialog(DialogWithImage) as dlg:
+            # Given a dialog with image
+            dlg.data["image_path"] = pkg_resources.resource_filename(__name__, "python_icon.png")
+            # Then Button and Label share the same image
+            self.assertEqual(dlg.button.cget("image"), dlg.label.cget("image"))
+            self.assertEqual(1, len(tkvue.image_cache(dlg.root).entries))
+            # When removing the image
+            dlg.data["image_path"] = ''
+            # Then image is not used anymore
+            self.assertEqual(1, len(tkvue.image_cache(dlg.root).unused))
+
+    def test_image_path_with_sprite_sheet(self):
+        with new_dialog(DialogWithImage) as dlg:
+            # Given an image of 20x20 pixels
+            image_path = pkg_resources.resource_filename(__name__, "python_icon.png")
+            # When displaying a region of the image
+            dlg.data["image_path"] = image_path + "#10x10:3"
+            # Then a single frame is displayed
+            self.assertEqual(1, len(dlg.label.frames))
+            self.assertEqual(10, dlg.label.frames[0].width())
+            # When displaying every frames of the sheet
+            dlg.data["image_path"] = image_path + "#10x10"
+            # Then image is animated
+            self.assertEqual(4, len(dlg.label.frames))
+            # When displaying a named region
+            tkvue.register_atlas(image_path, {"top": (0, 0, 20, 5)})
+            self.addCleanup(tkvue._atlases.pop, os.path.abspath(image_path), None)
+            dlg.data["image_path"] = image_path + "#top"
+            self.assertEqual(5, dlg.label.frames[0].height())
+
     @unittest.skipIf(IS_WINDOWS, "Not working on Windows CICD")
     def test_text_wrap(self):
         # Given a dialog with text wrap enabled
@@ -552,10 +1826,84 @@ class ComponentTest(unittest.TestCase):
             # Then widget get created
             self.assertEqual(2, len(dlg.winfo_children()))
 
+    def test_loop_updating_items(self):
+        # Given a dial with loop
+        with new_dialog(DialogWithLoop) as dlg:
+            dlg.data["items"] = [1, 2, 3, 4]
+            dlg.pump_events()
+            widgets = dlg.winfo_children()
+            # When updating a single item
+            dlg.data["items"] = [1, 5, 3, 4]
+            dlg.pump_events()
+            # Then widgets are kept and updated
+            self.assertEqual(widgets, dlg.winfo_children())
+            self.assertEqual(["1", "5", "3", "4"], [str(w.cget("text")) for w in widgets])
+
+    def test_loop_reactive_list(self):
+        # Given a dial with loop on a reactive list
+        with new_dialog(DialogWithLoop) as dlg:
+            dlg.data["items"] = tkvue.ReactiveList([1, 2, 3])
+            dlg.pump_events()
+            widgets = dlg.winfo_children()
+            # When inserting an item
+            dlg.data["items"].insert(1, 4)
+            dlg.pump_events()
+            # Then only a widget is created at the right location
+            new_widgets = dlg.root.pack_slaves()
+            self.assertEqual(["1", "4", "2", "3"], [str(w.cget("text")) for w in new_widgets])
+            self.assertEqual(widgets, [new_widgets[0]] + new_widgets[2:])
+            # When removing an item
+            dlg.data["items"].remove(2)
+            dlg.pump_events()
+            # Then the widget get destroyed
+            self.assertEqual(["1", "4", "3"], [str(w.cget("text")) for w in dlg.root.pack_slaves()])
+
+    def test_loop_with_key(self):
+        # Given a dialog with a keyed loop
+        with new_dialog(DialogWithKeyedLoop) as dlg:
+            dlg.pump_events()
+            widgets = dlg.root.pack_slaves()
+            self.assertEqual(5, len(widgets))
+            # When inserting, removing and moving items
+            dlg.data["items"] = [
+                {"id": 10, "name": "new"},
+                {"id": 4, "name": "item4"},
+                {"id": 0, "name": "item0"},
+                {"id": 2, "name": "renamed"},
+                {"id": 3, "name": "item3"},
+            ]
+            dlg.pump_events()
+            # Then existing widgets are reused and reordered
+            new_widgets = dlg.root.pack_slaves()
+            self.assertEqual(5, len(new_widgets))
+            self.assertEqual(["new", "item4", "item0", "renamed", "item3"], [w.cget("text") for w in new_widgets])
+            self.assertEqual(widgets[4], new_widgets[1])
+            self.assertEqual(widgets[0], new_widgets[2])
+            self.assertEqual(widgets[2], new_widgets[3])
+            self.assertEqual(widgets[3], new_widgets[4])
+            self.assertFalse(widgets[1].winfo_exists())
+
     def test_scrolled_frame(self):
         with new_dialog(DialogWithScrolledFrame) as dlg:
             dlg.pump_events()
 
+    def test_scrolled_frame_virtual(self):
+        # Given a virtual scrolled frame with a large list
+        with new_dialog(DialogWithVirtualScrolledFrame) as dlg:
+            dlg.pump_events()
+            # Then only visible rows are created
+            rows = dlg.scrolled_frame.interior.winfo_children()
+            self.assertLess(len(rows), 50)
+            self.assertEqual(0, dlg.scrolled_frame.yview()[0])
+            # When scrolling to the middle
+            dlg.scrolled_frame.yview("moveto", 0.5)
+            dlg.pump_events()
+            # Then rows get recycled to display the middle of the list
+            self.assertEqual(len(rows), len(dlg.scrolled_frame.interior.winfo_children()))
+            texts = [int(w.cget("text")) for w in rows if w.winfo_manager()]
+            self.assertIn(25000, texts)
+            self.assertAlmostEqual(0.5, dlg.scrolled_frame.yview()[0])
+
     @unittest.skipUnless(IS_LINUX, "fail randomly on Windows and MacOS due to race condition")
     def test_scrolled_frame_resize(self):
         with new_dialog(DialogWithScrolledFrame) as dlg:
@@ -597,6 +1945,18 @@ class ComponentTest(unittest.TestCase):
             # Then function get called
             self.assertEqual('arg1', dlg.value)
 
+    def test_command_in_loop(self):
+        # Given a dialog with a command using the loop variable
+        with new_dialog(DialogWithLoopCommand) as dlg:
+            dlg.pump_events()
+            # When invoking the buttons
+            for button in dlg.frame.winfo_children():
+                button.invoke()
+            # Then function get called with each item
+            self.assertEqual(["a", "b", "c"], dlg.selected)
+            # Then function is resolved once for the component
+            self.assertEqual(dlg.select, dlg.vue._functions["select"])
+
     def test_mainloop(self):
         # Given a dialog
         dlg = Dialog()